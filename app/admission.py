@@ -0,0 +1,88 @@
+# Admission control for expensive endpoints: per-route concurrency limits,
+# bounded wait queues with deadlines, and fast 429/503 rejection.
+from fastapi import HTTPException
+import asyncio
+import math
+import time
+
+# name -> AdmissionLimiter, reported by /api/metrics
+limiters = {}
+
+class AdmissionLimiter:
+    """FastAPI dependency that admits at most `max_concurrent` requests at a time.
+
+    Up to `max_queue` further requests wait for a slot for at most
+    `queue_timeout` seconds. When the queue is full the request is rejected
+    with 429, and when the deadline passes it is rejected with 503; both
+    carry a Retry-After header.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = None  # Created lazily inside the running event loop
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        limiters[name] = self
+
+    def reject(self, status_code, reason):
+        retry_after = max(1, math.ceil(self.queue_timeout))
+        raise HTTPException(
+            status_code=status_code,
+            detail=f"Server busy ({reason}), please retry later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    async def __call__(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        start = time.perf_counter()
+        if self.semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                self.reject(429, "queue full")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed_timeout += 1
+                self.reject(503, "queue timeout")
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+
+        waited = time.perf_counter() - start
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+            "avg_wait_ms": round(self.wait_total / self.admitted * 1000, 3) if self.admitted else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000, 3),
+        }
+
+def get_admission_stats():
+    return {name: limiter.stats() for name, limiter in limiters.items()}
@@ -0,0 +1,156 @@
+# Tiered answer cascade: cheap answer sources first, slow ones only when needed
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+class Tier:
+    """One answer source.
+
+    `func(user_input, context)` returns (answer, confidence) or None when the
+    tier does not apply to this request. Blocking tiers run in their own pool
+    of `max_workers` threads and are abandoned after `deadline` seconds. A
+    thread cannot be interrupted, so an abandoned call keeps its worker until
+    it returns; when all workers are busy the tier is skipped. If
+    `hedge_after` is set, a second identical call is started (if a worker is
+    free) when the first has not finished after that many seconds, and
+    whichever finishes first is used.
+    """
+
+    def __init__(self, name, func, blocking=False, deadline=None, hedge_after=None, max_workers=4):
+        self.name = name
+        self.func = func
+        self.blocking = blocking
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix=f"tier-{name}") if blocking else None
+        self.in_flight = 0
+        self.in_flight_lock = threading.Lock()
+        self.saturated = 0
+        self.attempts = 0
+        self.served = 0
+        self.low_confidence = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.hedged = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record_attempt(self, elapsed):
+        # Timeouts and errors count too, with the time spent waiting for them
+        self.attempts += 1
+        self.latency_total += elapsed
+        self.latency_max = max(self.latency_max, elapsed)
+
+    def submit(self, *args):
+        """Start func(*args) on a free worker, or return None if all are busy"""
+        with self.in_flight_lock:
+            if self.in_flight >= self.max_workers:
+                return None
+            self.in_flight += 1
+        future = self.executor.submit(self.func, *args)
+        future.add_done_callback(self.release)
+        return asyncio.wrap_future(future)
+
+    def release(self, future):
+        with self.in_flight_lock:
+            self.in_flight -= 1
+
+    def stats(self, requests):
+        return {
+            "attempts": self.attempts,
+            "served": self.served,
+            "hit_rate": round(self.served / requests, 4) if requests else 0.0,
+            "low_confidence": self.low_confidence,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            "saturated": self.saturated,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(self.latency_total / self.attempts * 1000, 4) if self.attempts else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 4),
+        }
+
+class AnswerCascade:
+    """Tries tiers in order and returns the first answer whose confidence is at
+    least `threshold`. If none qualifies, the most confident answer seen is
+    returned, or `default_answer` when no tier produced one."""
+
+    def __init__(self, tiers, threshold, default_answer):
+        self.tiers = tiers
+        self.threshold = threshold
+        self.default_answer = default_answer
+        self.requests = 0
+        self.fallbacks = 0
+
+    async def run_blocking(self, tier, user_input, context):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + tier.deadline if tier.deadline else None
+        first = tier.submit(user_input, context)
+        if first is None:
+            tier.saturated += 1
+            return None  # Skip the tier rather than queue behind abandoned calls
+        tasks = {first}
+        try:
+            if tier.hedge_after and (deadline is None or tier.hedge_after < tier.deadline):
+                done, _ = await asyncio.wait(tasks, timeout=tier.hedge_after)
+                if not done:
+                    hedge = tier.submit(user_input, context)
+                    if hedge is not None:
+                        tier.hedged += 1
+                        tasks.add(hedge)
+            timeout = max(0.0, deadline - loop.time()) if deadline else None
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError
+            return done.pop().result()
+        finally:
+            # Threads cannot be interrupted; the losing call finishes in the
+            # background and holds its worker until then
+            for task in tasks:
+                task.cancel()
+
+    async def answer(self, user_input, context):
+        self.requests += 1
+        best = None
+        for tier in self.tiers:
+            start = time.perf_counter()
+            try:
+                if tier.blocking:
+                    result = await self.run_blocking(tier, user_input, context)
+                else:
+                    result = tier.func(user_input, context)
+            except asyncio.TimeoutError:
+                tier.record_attempt(time.perf_counter() - start)
+                tier.timeouts += 1
+                continue
+            except Exception as e:
+                tier.record_attempt(time.perf_counter() - start)
+                tier.errors += 1
+                print(f"Answer tier {tier.name} failed: {e}")
+                continue
+            if result is None:
+                continue  # Tier does not apply to this request
+
+            tier.record_attempt(time.perf_counter() - start)
+            answer, confidence = result
+            if confidence >= self.threshold:
+                tier.served += 1
+                return {"answer": answer, "tier": tier.name, "confidence": confidence}
+            tier.low_confidence += 1
+            if best is None or confidence > best["confidence"]:
+                best = {"answer": answer, "tier": tier.name, "confidence": confidence}
+
+        self.fallbacks += 1
+        if best is not None and best["confidence"] > 0:
+            return best
+        return {"answer": self.default_answer, "tier": "default", "confidence": 0.0}
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "threshold": self.threshold,
+            "below_threshold": self.fallbacks,
+            "tiers": {tier.name: tier.stats(self.requests) for tier in self.tiers},
+        }
@@ -0,0 +1,150 @@
+# Food composition table and prefix/autocomplete index for /api/foods/search
+from bisect import bisect_left
+import heapq
+import csv
+import re
+import unicodedata
+
+NUTRIENT_COLUMNS = {
+    'kalori': ('kalori', 'calories', 'energy_kcal', 'energi'),
+    'protein': ('protein',),
+    'karbohidrat': ('karbohidrat', 'carbohydrate', 'carbs'),
+    'lemak': ('lemak', 'fat'),
+}
+NAME_COLUMNS = ('nama', 'name', 'food', 'makanan')
+CATEGORY_COLUMNS = ('kategori', 'category', 'kelompok', 'group')  # Optional
+
+def normalize(text):
+    """Lowercase, strip accents and collapse everything but letters/digits to single spaces"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+def load_food_table(file_path):
+    """Load {name: {'kalori', 'protein', 'karbohidrat', 'lemak'}} (per 100g) from a CSV file.
+
+    If the file has a category column its value is kept under 'kategori'.
+    """
+    foods = {}
+    try:
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            columns = {h.strip().lower(): h for h in reader.fieldnames or []}
+            name_column = next((columns[c] for c in NAME_COLUMNS if c in columns), None)
+            category_column = next((columns[c] for c in CATEGORY_COLUMNS if c in columns), None)
+            nutrient_columns = {}
+            for nutrient, aliases in NUTRIENT_COLUMNS.items():
+                nutrient_columns[nutrient] = next((columns[c] for c in aliases if c in columns), None)
+            if name_column is None or None in nutrient_columns.values():
+                print(f"Warning: food table needs name, kalori, protein, karbohidrat and lemak columns, found {reader.fieldnames}")
+                return foods
+            for row in reader:
+                name = (row[name_column] or '').strip()
+                try:
+                    nutrients = {n: float(row[c] or 0) for n, c in nutrient_columns.items()}
+                except ValueError:
+                    continue
+                if category_column is not None:
+                    nutrients['kategori'] = (row[category_column] or '').strip()
+                if name:
+                    foods[name] = nutrients
+    except Exception as e:
+        print(f"Error loading food table: {e}")
+    return foods
+
+class FoodIndex:
+    """Sorted-array prefix index over food names.
+
+    Every name is indexed from each of its word boundaries, so "dada"
+    finds "Ayam Dada". Matches are ranked: exact name, then name prefix,
+    then word prefix; ties go to the shorter name.
+
+    A prefix matching at most `max_scan` keys is ranked at query time from
+    a short scan of the sorted arrays. Prefixes matching more ("heavy"
+    prefixes, e.g. "a" or "ayam") have their top `max_results` ranked once
+    when the index is built, so no lookup scans more than `max_scan` keys.
+    """
+
+    def __init__(self, foods, max_scan=64, max_results=50):
+        self.foods = foods
+        self.names = list(foods)
+        self.max_scan = max_scan
+        self.max_results = max_results
+        self.name_keys = []   # (normalized full name, food id)
+        self.word_keys = []   # (normalized name from a later word onwards, food id)
+        for food_id, name in enumerate(self.names):
+            key = normalize(name)
+            self.name_keys.append((key, food_id))
+            for match in re.finditer(r' ', key):
+                self.word_keys.append((key[match.end():], food_id))
+        self.name_keys.sort()
+        self.word_keys.sort()
+        # Tie-break position of each food: shorter names first, then alphabetical
+        self.order = [0] * len(self.names)
+        for position, (_, _, food_id) in enumerate(sorted((len(key), key, food_id) for key, food_id in self.name_keys)):
+            self.order[food_id] = position
+        self.heavy_prefixes = self.rank_heavy_prefixes()
+
+    def rank_heavy_prefixes(self):
+        """{prefix: top food ids} for every prefix matching more than max_scan keys"""
+        exact = {}  # normalized name -> food ids, best first
+        for key, food_id in sorted(self.name_keys, key=lambda entry: self.order[entry[1]]):
+            exact.setdefault(key, []).append(food_id)
+        # (key, food id) sorted once by rank outside of exact matches (name before
+        # word key) and then tie-break order; every group below keeps that order
+        entries = sorted([(key, food_id, 1) for key, food_id in self.name_keys]
+                         + [(key, food_id, 2) for key, food_id in self.word_keys],
+                         key=lambda entry: (entry[2], self.order[entry[1]]))
+        heavy = {}
+        length = 1
+        # A prefix can only be heavy if the prefix one character shorter is, so
+        # each round only looks at the keys under the previous round's heavy prefixes
+        while entries:
+            groups = {}
+            for entry in entries:
+                if len(entry[0]) >= length:
+                    groups.setdefault(entry[0][:length], []).append(entry)
+            entries = []
+            for prefix, group in groups.items():
+                if len(group) <= self.max_scan:
+                    continue
+                best = list(exact.get(prefix, ()))[:self.max_results]
+                seen = set(best)
+                for _, food_id, _ in group:
+                    if len(best) >= self.max_results:
+                        break
+                    if food_id not in seen:
+                        seen.add(food_id)
+                        best.append(food_id)
+                heavy[prefix] = best
+                entries.extend(group)
+            length += 1
+        return heavy
+
+    def scan(self, keys, prefix):
+        start = bisect_left(keys, (prefix,))
+        for key, food_id in keys[start:start + self.max_scan]:
+            if not key.startswith(prefix):
+                break
+            yield key, food_id
+
+    def search(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if prefix in self.heavy_prefixes:
+            return self.results(self.heavy_prefixes[prefix][:limit])
+        return self.rank(prefix, limit)
+
+    def rank(self, prefix, limit):
+        # Not a heavy prefix, so both scans see every match
+        ranked = {}
+        for key, food_id in self.scan(self.name_keys, prefix):
+            ranked[food_id] = 0 if key == prefix else 1
+        for _, food_id in self.scan(self.word_keys, prefix):
+            ranked.setdefault(food_id, 2)
+        best = heapq.nsmallest(limit, ranked, key=lambda food_id: (ranked[food_id], self.order[food_id]))
+        return self.results(best)
+
+    def results(self, food_ids):
+        return [dict(name=self.names[food_id], **self.foods[self.names[food_id]]) for food_id in food_ids]
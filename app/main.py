@@ -1,8 +1,28 @@
-from fastapi import FastAPI, APIRouter, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 import os
+import sys
 import csv
 import json
+from services import (
+    FOOD_DATA, SYMPTOMS, get_diet_recommendation, calculate_nutrition,
+    diagnose_symptoms, match_dataset, ask_openai, DEFAULT_RESPONSE
+)
+from schemas import (
+    ChatRequest, DietRequest, CaloriesRequest, DiagnosisRequest, TriageAnswerRequest,
+    MessageResponse, ChatResponse, DiseaseResponse, DietResponse,
+    FoodsResponse, FoodSearchResponse, CaloriesResponse, SymptomsResponse, DiagnosisResponse,
+    TriageResponse
+)
+from serialization import ORJSONResponse, TimedRoute, get_serialization_stats
+from admission import AdmissionLimiter, get_admission_stats
+from sessions import SessionStore, SESSION_ID_PATTERN
+from static_cache import PrecompressedPayload
+from cascade import Tier, AnswerCascade
+from food_index import FoodIndex, load_food_table
+from meal_plan import MealPlanner
+from triage import TriageEngine, TriageSessions, symptom_label, MAX_CONDITIONS
 
 # Load Environment Variables 
 load_dotenv()
@@ -14,14 +34,43 @@ db_pass = os.getenv("DB_PASS", "")
 debug_mode = os.getenv("DEBUG", "False").lower() == "true"
 port = int(os.getenv("PORT", 8000))
 
+# Admission control for /api/chat (OpenAI/LLM path)
+chat_max_concurrent = int(os.getenv("CHAT_MAX_CONCURRENT", 4))
+chat_max_queue = int(os.getenv("CHAT_MAX_QUEUE", 16))
+chat_queue_timeout = float(os.getenv("CHAT_QUEUE_TIMEOUT", 10))
+
+# Server-side conversation sessions for /api/chat
+session_max_bytes = int(os.getenv("SESSION_MAX_BYTES", 256 * 1024 * 1024))
+session_ttl = float(os.getenv("SESSION_TTL", 3600))
+session_max_turns = int(os.getenv("SESSION_MAX_TURNS", 20))
+session_spill_dir = os.getenv("SESSION_SPILL_DIR") or None
+
+# Answer cascade for /api/chat: keyword -> dataset -> local LLM -> OpenAI
+cascade_threshold = float(os.getenv("CASCADE_THRESHOLD", 0.6))
+enable_local_llm = os.getenv("ENABLE_LOCAL_LLM", "False").lower() == "true"
+llm_deadline = float(os.getenv("LLM_DEADLINE", 10))
+openai_deadline = float(os.getenv("OPENAI_DEADLINE", 20))
+openai_hedge_after = float(os.getenv("OPENAI_HEDGE_AFTER", 0)) or None  # 0 disables hedging
+# Worker threads per blocking tier; calls past their deadline keep a worker until they return
+llm_max_workers = int(os.getenv("LLM_MAX_WORKERS", chat_max_concurrent))
+openai_max_workers = int(os.getenv("OPENAI_MAX_WORKERS", chat_max_concurrent))
+
+# Adaptive triage sessions
+triage_max_sessions = int(os.getenv("TRIAGE_MAX_SESSIONS", 10000))
+triage_ttl = float(os.getenv("TRIAGE_TTL", 1800))
+triage_max_questions = int(os.getenv("TRIAGE_MAX_QUESTIONS", 15))
+
 print(f"Database Host: {db_host}")
 print(f"Database User: {db_user}")
 print(f"Debug Mode: {debug_mode}")
 print(f"API will run on port: {port}")
 
 # FastAPI Setup
-app = FastAPI(debug=debug_mode)
-router = APIRouter()
+app = FastAPI(debug=debug_mode, default_response_class=ORJSONResponse)
+app.router.route_class = TimedRoute
+router = APIRouter(route_class=TimedRoute)
+chat_limiter = AdmissionLimiter("chat", chat_max_concurrent, chat_max_queue, chat_queue_timeout)
+session_store = SessionStore(session_max_bytes, session_ttl, session_max_turns, session_spill_dir)
 
 # Helper Functions 
 def load_symptom_data(file_path):
@@ -64,55 +113,213 @@ try:
 except Exception as e:
     print(f"Error loading symptom data: {e}")
 
+# Pre-render the static lookup responses (they only change with symptom_Description.csv)
+root_payload = PrecompressedPayload({"message": "Welcome to HealthierBot!"})
+disease_payloads = {
+    disease: PrecompressedPayload({"disease": disease, "description": description})
+    for disease, description in symptom_data.items()
+}
+
+# Load Triage Dataset (symptoms per disease)
+triage_engine = TriageEngine(os.path.join(os.getcwd(), "disease symptom prediction", "dataset.csv"))
+triage_sessions = TriageSessions(triage_engine, triage_max_sessions, triage_ttl, triage_max_questions)
+
+# Load Food Composition Table (per 100g); falls back to the built-in sample foods
+food_data = {}
+food_data_file = os.getenv("FOOD_DATA_FILE", "food_composition.csv")
+if os.path.exists(food_data_file):
+    food_data = load_food_table(food_data_file)
+if not food_data:
+    food_data = FOOD_DATA
+food_index = FoodIndex(food_data)
+meal_planner = MealPlanner(food_data)
+
 # Load Chatbot Medical Dataset
-chatbot_dataset = {}
+chatbot_dataset = []
 try:
     with open('chatbot_medical_dataset.json', 'r') as file:
         chatbot_dataset = json.load(file)
 except Exception as e:
     print(f"Error loading chatbot medical dataset: {e}")
 
+# Keywords in the message -> symptom_data key (lowercased disease name)
+KEYWORD_DISEASES = {
+    "cough": "common cold",
+    "batuk": "common cold",
+    "runny nose": "common cold",
+    "pilek": "common cold",
+    "sneez": "common cold",
+    "bersin": "common cold",
+}
+
+# Answer tiers: each returns (answer, confidence), or None when it does not apply
+def keyword_tier(user_input, context):
+    text = user_input.lower()
+    for keyword, disease in KEYWORD_DISEASES.items():
+        if keyword in text and disease in symptom_data:
+            return symptom_data[disease], 0.7
+    # The message names a disease from the dataset
+    for disease, description in symptom_data.items():
+        if disease in text:
+            return description, 0.7
+    return None
+
+def dataset_tier(user_input, context):
+    return match_dataset(user_input, chatbot_dataset)
+
+def llm_tier(user_input, context):
+    # Imported lazily: loading models.py loads the model weights
+    from models import generate_response_with_confidence
+    return generate_response_with_confidence(user_input, adapter=context.get("adapter"))
+
+def available_adapters():
+    # Imported lazily like llm_tier; the first call loads the model and adapters
+    from models import adapter_names
+    return adapter_names()
+
+def openai_tier(user_input, context):
+    if not (context.get("use_openai") and context.get("openai_api_key")):
+        return None
+    return ask_openai(user_input, context["history"], context["openai_api_key"]), 0.9
+
+answer_tiers = [Tier("keyword", keyword_tier), Tier("dataset", dataset_tier)]
+if enable_local_llm:
+    answer_tiers.append(Tier("llm", llm_tier, blocking=True, deadline=llm_deadline, max_workers=llm_max_workers))
+answer_tiers.append(Tier("openai", openai_tier, blocking=True, deadline=openai_deadline,
+                         hedge_after=openai_hedge_after, max_workers=openai_max_workers))
+chat_cascade = AnswerCascade(answer_tiers, cascade_threshold, DEFAULT_RESPONSE)
+
 # Routes 
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to HealthierBot!"}
-
-@router.post("/chat")
-async def chat(request: Request):
-    data = await request.json()
-    user_input = data.get("input")
-    if not user_input:
-        return {"error": "User input is missing."}
+@app.get("/", response_model=MessageResponse)
+async def read_root(request: Request):
+    return root_payload.response(request)
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(chat_limiter)])
+async def chat(body: ChatRequest):
+    session_id = body.session_id or session_store.new_session_id()
+    if not SESSION_ID_PATTERN.match(session_id):
+        raise HTTPException(status_code=400, detail="Invalid session_id.")
+    if body.adapter is not None:
+        if not enable_local_llm:
+            raise HTTPException(status_code=400, detail="adapter requires the local LLM (ENABLE_LOCAL_LLM=True).")
+        adapters = await run_in_threadpool(available_adapters)
+        if body.adapter not in adapters:
+            raise HTTPException(status_code=400, detail=f"Unknown adapter: {body.adapter}. Available: {', '.join(adapters) or 'none'}.")
     try:
-        response = generate_response(user_input)
+        response = generate_response(body.input)
         disease_name = response.get("disease_name")
         description = get_disease_description(disease_name, symptom_data)
-        return {"response": response, "description": description}
+        # Full answer for the chat UI from the cheapest tier that is confident enough
+        context = {"use_openai": body.use_openai, "openai_api_key": body.openai_api_key, "history": [], "adapter": body.adapter}
+        if body.use_openai and body.openai_api_key:
+            context["history"] = ([message.model_dump() for message in body.history]
+                                  or await run_in_threadpool(session_store.get_history, session_id))
+        result = await chat_cascade.answer(body.input, context)
+        answer = result["answer"]
+        # Spilling to disk does blocking I/O; keep it off the event loop
+        await run_in_threadpool(session_store.append, session_id, "user", body.input)
+        await run_in_threadpool(session_store.append, session_id, "assistant", answer)
+        return {
+            "response": response, "description": description, "answer": answer,
+            "tier": result["tier"], "confidence": result["confidence"], "session_id": session_id
+        }
     except Exception as e:
-        return {"error": f"An error occurred while processing the request: {e}"}
+        raise HTTPException(status_code=500, detail=f"An error occurred while processing the request: {e}")
 
-@router.get("/disease/{disease_name}")
-async def get_disease_info(disease_name: str):
+@router.get("/disease/{disease_name}", response_model=DiseaseResponse)
+async def get_disease_info(disease_name: str, request: Request):
+    payload = disease_payloads.get(disease_name.lower())
+    if payload is not None:
+        return payload.response(request)
     description = get_disease_description(disease_name, symptom_data)
     return {"disease": disease_name, "description": description}
 
-@app.post("/diet")
-async def suggest_diet(request: Request):
-    data = await request.json()
-    user_input = data.get("input")
-    if not user_input:
-        return {"error": "User input is missing."}
-    # TODO: Implement LLM or rules-based diet generation
-    return {"diet": f"Balanced diet suggestion based on input: {user_input}"}
-
-@app.post("/calories")
-async def calculate_calories(request: Request):
-    data = await request.json()
-    food_items = data.get("food_items")
-    if not food_items:
-        return {"error": "Food items are missing."}
-    # TODO: Implement calorie calculation logic
-    return {"calories": f"Calories calculated for food items: {food_items}"}
+# Sync handler: a meal plan that is not cached yet is solved in the threadpool
+@router.post("/diet", response_model=DietResponse)
+def suggest_diet(body: DietRequest):
+    hasil = get_diet_recommendation(
+        body.berat_badan, body.tinggi_badan, body.usia,
+        body.jenis_kelamin, body.aktivitas, body.tujuan
+    )
+    hasil["meal_plan"] = meal_planner.plan_for(hasil["kalori_harian"])
+    return hasil
+
+@router.get("/foods", response_model=FoodsResponse)
+async def list_foods():
+    return {"foods": food_data}
+
+@router.get("/foods/search", response_model=FoodSearchResponse)
+async def search_foods(q: str, limit: int = Query(10, ge=1, le=50)):
+    return {"query": q, "results": food_index.search(q, limit)}
+
+@router.post("/calories", response_model=CaloriesResponse)
+async def calculate_calories(body: CaloriesRequest):
+    if not body.food_items:
+        raise HTTPException(status_code=400, detail="Food items are missing.")
+    items = []
+    for item in body.food_items:
+        nutrition = calculate_nutrition(item.name, item.portion, food_data)
+        if nutrition is None:
+            raise HTTPException(status_code=404, detail=f"Unknown food item: {item.name}")
+        items.append(nutrition)
+    total = {key: round(sum(i[key] for i in items), 1) for key in ("kalori", "protein", "karbohidrat", "lemak")}
+    return {"items": items, "total": total}
+
+@router.get("/symptoms", response_model=SymptomsResponse)
+async def list_symptoms():
+    return {"symptoms": SYMPTOMS}
+
+@router.post("/diagnosis", response_model=DiagnosisResponse)
+async def diagnose(body: DiagnosisRequest):
+    if not body.symptoms:
+        raise HTTPException(status_code=400, detail="Symptoms are missing.")
+    return {"conditions": diagnose_symptoms(body.symptoms)}
+
+def triage_response(session_id, session):
+    candidates = triage_engine.candidates(session.posterior)
+    remaining = len(candidates)
+    done = session.question is None
+    conditions = []
+    if done or remaining <= MAX_CONDITIONS:
+        conditions = [
+            {"disease": disease, "description": get_disease_description(disease, symptom_data),
+             "probability": round(probability, 4)}
+            for disease, probability in candidates[:MAX_CONDITIONS]
+        ]
+    return {
+        "session_id": session_id,
+        "question": session.question,
+        "question_label": symptom_label(session.question) if session.question else None,
+        "remaining": remaining,
+        "done": done,
+        "conditions": conditions,
+    }
+
+@router.post("/triage/start", response_model=TriageResponse)
+async def start_triage():
+    session_id, session = triage_sessions.start()
+    return triage_response(session_id, session)
+
+@router.post("/triage/answer", response_model=TriageResponse)
+async def answer_triage(body: TriageAnswerRequest):
+    session = triage_sessions.get(body.session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Triage session not found or expired.")
+    if session.question is not None:
+        triage_sessions.answer(session, body.answer)
+    return triage_response(body.session_id, session)
+
+@router.get("/metrics")
+async def get_metrics():
+    return {
+        "serialization": get_serialization_stats(),
+        "admission": get_admission_stats(),
+        "sessions": session_store.stats(),
+        "cascade": chat_cascade.stats(),
+        # Only once the LLM tier has loaded models.py; importing it here would load the weights
+        "adapters": sys.modules["models"].get_adapter_stats() if "models" in sys.modules else None,
+        "triage": {"sessions": len(triage_sessions.sessions), "diseases": len(triage_engine.diseases), "symptoms": len(triage_engine.symptoms)},
+    }
 
 # Include router
 app.include_router(router, prefix="/api")
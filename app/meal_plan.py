@@ -0,0 +1,205 @@
+# Calorie-targeted meal plans for /api/diet
+from functools import lru_cache
+from food_index import normalize
+
+# Share of the daily calories per meal
+MEALS = {"sarapan": 0.25, "makan_siang": 0.40, "makan_malam": 0.35}
+
+# Acceptable share of a meal's calories from each macronutrient
+MACRO_RANGES = {"protein": (0.15, 0.30), "karbohidrat": (0.45, 0.60), "lemak": (0.20, 0.35)}
+KCAL_PER_GRAM = {"protein": 4, "karbohidrat": 4, "lemak": 9}
+
+# Plate template: one food from each slot, portion choices in grams for a
+# meal of up to REFERENCE_MEAL_KCAL; larger meals scale the portions up
+PORTIONS = {
+    "protein": range(50, 201, 25),
+    "karbohidrat": range(50, 301, 25),
+    "sayur_buah": range(50, 201, 50),
+}
+REFERENCE_MEAL_KCAL = 700
+PORTION_STEP = 25  # Scaled portions are rounded to this many grams
+
+POOL_SIZE = 8        # Foods per slot considered for one meal
+BUCKET_KCAL = 10     # Calorie resolution of the DP table
+STATES_PER_BUCKET = 2
+KCAL_TOLERANCE = 0.05
+CACHE_KCAL_STEP = 50  # Plans are cached per 50 kcal of daily target
+REUSE_PENALTY = 0.15  # Per food already served in an earlier meal of the day
+
+# Words in a food's category (if the table has one) that place it in a slot.
+# A category matching none of them, e.g. drinks, sugar or oil, is not used.
+CATEGORY_SLOTS = {
+    "protein": ("lauk", "daging", "ikan", "unggas", "telur", "kacang", "meat", "fish", "poultry", "egg", "legume"),
+    "karbohidrat": ("serealia", "umbi", "pokok", "nasi", "roti", "mi", "mie", "cereal", "grain", "tuber", "bread", "pasta", "staple"),
+    "sayur_buah": ("sayur", "sayuran", "buah", "vegetable", "vegetables", "fruit", "fruits"),
+}
+
+# Without a category column: words in a food's name that mark drinks and sugars
+EXCLUDED_NAME_WORDS = {
+    "gula", "sirup", "sirop", "madu", "permen", "selai", "teh", "kopi", "jus", "minuman", "soda", "susu", "kaldu",
+    "sugar", "syrup", "honey", "candy", "jam", "tea", "coffee", "juice", "drink", "milk", "broth",
+}
+
+# Typical food of each slot: (protein, karbohidrat, lemak) share of calories, kcal per 100g
+SLOT_PROFILES = {
+    "protein": ((0.60, 0.05, 0.35), 170),
+    "karbohidrat": ((0.10, 0.85, 0.05), 130),
+    "sayur_buah": ((0.20, 0.70, 0.10), 40),
+}
+
+def macro_shares(nutrients):
+    kalori = nutrients["kalori"]
+    return tuple(nutrients[macro] * KCAL_PER_GRAM[macro] / kalori for macro in ("protein", "karbohidrat", "lemak"))
+
+def category_slot(category):
+    words = set(normalize(category).split())
+    for slot, slot_words in CATEGORY_SLOTS.items():
+        if words & set(slot_words):
+            return slot
+    return None
+
+def classify_food(name, nutrients):
+    """Assign a food to a plate slot, or None if it fits none (e.g. drinks, sugar, mostly fat)"""
+    kalori = nutrients["kalori"]
+    if kalori <= 0:
+        return None
+    if nutrients.get("kategori"):
+        return category_slot(nutrients["kategori"])
+    if set(normalize(name).split()) & EXCLUDED_NAME_WORDS:
+        return None
+    protein_share, karbohidrat_share, _ = macro_shares(nutrients)
+    # A protein source needs both a high protein share and enough protein per portion
+    # (so egg white counts, spinach does not)
+    if protein_share >= 0.3 and nutrients["protein"] >= 8:
+        return "protein"
+    if kalori < 60:
+        return "sayur_buah"
+    if karbohidrat_share >= 0.5:
+        return "karbohidrat"
+    return None
+
+def typicality(slot, nutrients):
+    """Distance of a food from the typical profile of its slot (lower is more typical)"""
+    shares, kalori = SLOT_PROFILES[slot]
+    distance = sum(abs(share - target) for share, target in zip(macro_shares(nutrients), shares))
+    return distance + abs(nutrients["kalori"] - kalori) / kalori
+
+def macro_penalty(kalori, protein, karbohidrat, lemak):
+    """Sum of how far each macro share is outside its range"""
+    if kalori <= 0:
+        return 3.0
+    penalty = 0.0
+    for macro, grams in (("protein", protein), ("karbohidrat", karbohidrat), ("lemak", lemak)):
+        share = grams * KCAL_PER_GRAM[macro] / kalori
+        low, high = MACRO_RANGES[macro]
+        if share < low:
+            penalty += low - share
+        elif share > high:
+            penalty += share - high
+    return penalty
+
+class MealPlanner:
+    """Picks one food and portion per plate slot for each meal.
+
+    Each meal is a multiple-choice knapsack: exactly one (food, portion)
+    option from each slot, solved by DP over calorie buckets. States above
+    the calorie window are pruned, and each bucket keeps only its
+    STATES_PER_BUCKET best partial plans by macro balance. The final plan
+    is the one in the window with the best macro balance.
+    """
+
+    def __init__(self, foods):
+        self.foods = foods
+        pools = {slot: [] for slot in PORTIONS}
+        for name, nutrients in foods.items():
+            slot = classify_food(name, nutrients)
+            if slot is not None:
+                pools[slot].append(name)
+
+        # Most typical foods of each slot first
+        self.pools = {slot: sorted(names, key=lambda name: (typicality(slot, self.foods[name]), name))[:POOL_SIZE * len(MEALS)]
+                      for slot, names in pools.items()}
+        self.plan = lru_cache(maxsize=256)(self._plan)
+
+    def plan_for(self, kalori_harian):
+        bucket = max(CACHE_KCAL_STEP, round(kalori_harian / CACHE_KCAL_STEP) * CACHE_KCAL_STEP)
+        return self.plan(bucket)
+
+    def _plan(self, kalori_harian):
+        if not all(self.pools.values()):
+            return None
+        used = set()
+        plan = {}
+        for meal, share in MEALS.items():
+            plan[meal] = self.plan_meal(kalori_harian * share, used)
+            used.update(item["nama"] for item in plan[meal]["items"])
+        return plan
+
+    def slot_options(self, slot, used, scale=1.0):
+        # Prefer foods not yet used in an earlier meal, for variety
+        pool = sorted(self.pools[slot], key=lambda name: name in used)[:POOL_SIZE]
+        portions = sorted({max(PORTION_STEP, round(grams * scale / PORTION_STEP) * PORTION_STEP)
+                           for grams in PORTIONS[slot]})
+        options = []
+        for name in pool:
+            n = self.foods[name]
+            for grams in portions:
+                factor = grams / 100
+                options.append((name, grams, n["kalori"] * factor, n["protein"] * factor,
+                                n["karbohidrat"] * factor, n["lemak"] * factor))
+        return options
+
+    def plan_meal(self, target, used):
+        def penalty(state):
+            reused = sum(1 for name, _ in state[4] if name in used)
+            return macro_penalty(*state[:4]) + REUSE_PENALTY * reused
+
+        max_kcal = target * (1 + KCAL_TOLERANCE)
+        scale = max(1.0, target / REFERENCE_MEAL_KCAL)
+        # bucket -> [(kalori, protein, karbohidrat, lemak, choices)]
+        states = {0: [(0.0, 0.0, 0.0, 0.0, ())]}
+        for slot in PORTIONS:
+            options = self.slot_options(slot, used, scale)
+            next_states = {}
+            smallest_overflow = None
+            for entries in states.values():
+                for kalori, protein, karbohidrat, lemak, choices in entries:
+                    for name, grams, o_kal, o_pro, o_karb, o_lem in options:
+                        total = kalori + o_kal
+                        state = (total, protein + o_pro, karbohidrat + o_karb, lemak + o_lem, choices + ((name, grams),))
+                        if total > max_kcal:
+                            # Prune: later slots only add calories
+                            if smallest_overflow is None or total < smallest_overflow[0]:
+                                smallest_overflow = state
+                            continue
+                        next_states.setdefault(int(total // BUCKET_KCAL), []).append(state)
+            if not next_states:
+                # Even the smallest portions overshoot; keep the closest plan
+                next_states[int(smallest_overflow[0] // BUCKET_KCAL)] = [smallest_overflow]
+            for bucket, entries in next_states.items():
+                entries.sort(key=penalty)
+                del entries[STATES_PER_BUCKET:]
+            states = next_states
+
+        def score(state):
+            return abs(state[0] - target) / target + penalty(state)
+
+        candidates = [s for entries in states.values() for s in entries]
+        in_window = [s for s in candidates if abs(s[0] - target) <= target * KCAL_TOLERANCE]
+        # Outside the window only when no combination reaches it; reported as dalam_target
+        best = min(in_window or candidates, key=score)
+
+        items = []
+        for name, grams in best[4]:
+            n = self.foods[name]
+            factor = grams / 100
+            items.append({
+                "nama": name,
+                "porsi": grams,
+                "kalori": round(n["kalori"] * factor, 1),
+                "protein": round(n["protein"] * factor, 1),
+                "karbohidrat": round(n["karbohidrat"] * factor, 1),
+                "lemak": round(n["lemak"] * factor, 1),
+            })
+        total = {key: round(sum(item[key] for item in items), 1) for key in ("kalori", "protein", "karbohidrat", "lemak")}
+        return {"target_kalori": round(target), "items": items, "total": total, "dalam_target": bool(in_window)}
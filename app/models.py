@@ -1,10 +1,25 @@
 from transformers import AutoTokenizer, AutoModelForCausalLM, Trainer, TrainingArguments, Wav2Vec2ForCTC, Wav2Vec2Processor
+from transformers.trainer_utils import get_last_checkpoint
 from torch.utils.data import Dataset
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
 import torch
 import librosa
+import soundfile  # Installed with librosa
+import soxr
+import threading
 import json
+import time
 import os
 
+try:
+    from peft import LoraConfig, PeftModel, get_peft_model
+except ImportError:
+    LoraConfig = PeftModel = get_peft_model = None
+
 # Load the dataset with error handling (only when training)
 def load_dataset():
     try:
@@ -40,6 +55,68 @@ class MedicalDataset(Dataset):
         labels = outputs['input_ids'][0]
         return {'input_ids': input_ids, 'attention_mask': attention_mask, 'labels': labels}
 
+# Packs several short prompt/response pairs into each sequence instead of
+# padding every pair to max_length. Tokens only attend within their own pair
+# (block-diagonal causal mask built in packed_collate) and position ids
+# restart at 0 for each pair. Loss is computed on response tokens only.
+class PackedMedicalDataset(Dataset):
+    def __init__(self, data, tokenizer, max_length=512):
+        self.max_length = max_length
+        self.pad_token_id = tokenizer.pad_token_id
+        pairs = []
+        for entry in data:
+            prompt_ids = tokenizer(entry['prompt'] + "\n", add_special_tokens=False)['input_ids']
+            response_ids = tokenizer(entry['response'], add_special_tokens=False)['input_ids'] + [tokenizer.eos_token_id]
+            input_ids = (prompt_ids + response_ids)[:max_length]
+            labels = ([-100] * len(prompt_ids) + response_ids)[:max_length]
+            pairs.append((input_ids, labels))
+
+        # First-fit decreasing: longest pairs first, each into the first sequence with room
+        bins = []
+        for input_ids, labels in sorted(pairs, key=lambda pair: len(pair[0]), reverse=True):
+            for packed in bins:
+                if packed['length'] + len(input_ids) <= max_length:
+                    break
+            else:
+                packed = {'length': 0, 'pairs': []}
+                bins.append(packed)
+            packed['pairs'].append((input_ids, labels))
+            packed['length'] += len(input_ids)
+        self.sequences = bins
+        self.num_pairs = len(pairs)
+        self.num_tokens = sum(packed['length'] for packed in bins)
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def __getitem__(self, idx):
+        input_ids, labels, position_ids, segment_ids = [], [], [], []
+        for segment, (pair_ids, pair_labels) in enumerate(self.sequences[idx]['pairs'], start=1):
+            input_ids += pair_ids
+            labels += pair_labels
+            position_ids += list(range(len(pair_ids)))
+            segment_ids += [segment] * len(pair_ids)
+        padding = self.max_length - len(input_ids)
+        return {
+            'input_ids': torch.tensor(input_ids + [self.pad_token_id] * padding),
+            'labels': torch.tensor(labels + [-100] * padding),
+            'position_ids': torch.tensor(position_ids + [0] * padding),
+            'segment_ids': torch.tensor(segment_ids + [0] * padding),  # 0 = padding
+        }
+
+def packed_collate(features):
+    batch = {key: torch.stack([f[key] for f in features]) for key in ('input_ids', 'labels', 'position_ids')}
+    segment_ids = torch.stack([f['segment_ids'] for f in features])
+    length = segment_ids.shape[1]
+    same_segment = segment_ids[:, :, None] == segment_ids[:, None, :]
+    causal = torch.tril(torch.ones(length, length, dtype=torch.bool))
+    allowed = same_segment & causal & (segment_ids != 0)[:, :, None]
+    allowed |= torch.eye(length, dtype=torch.bool)  # Padding rows attend to themselves only
+    # Inverted 4D mask (0 = attend, dtype min = blocked), as expected by Hugging Face models
+    mask = torch.zeros(allowed.shape, dtype=torch.float32).masked_fill(~allowed, torch.finfo(torch.float32).min)
+    batch['attention_mask'] = mask[:, None, :, :]
+    return batch
+
 # Initialize the tokenizer and model
 MODEL_NAME = "llama4:scout"  # Using the latest Llama 4 Scout model
 try:
@@ -66,34 +143,198 @@ def get_train_dataset(tokenizer):
     return train_dataset
 
 # Define training arguments
-training_args = TrainingArguments(
-    output_dir='./results',
-    num_train_epochs=3,
-    per_device_train_batch_size=2,
-    save_steps=10,
-    save_total_limit=2,
-    logging_dir='./logs',
-    logging_steps=10,
-)
+def get_training_args(gradient_accumulation_steps=1):
+    return TrainingArguments(
+        output_dir='./results',
+        num_train_epochs=3,
+        per_device_train_batch_size=2,
+        gradient_accumulation_steps=gradient_accumulation_steps,
+        save_steps=10,
+        save_total_limit=2,
+        logging_dir='./logs',
+        logging_steps=10,
+    )
+
+training_args = get_training_args()
+
+def get_packed_training_args(gradient_accumulation_steps=1):
+    return TrainingArguments(
+        output_dir='./results_packed',
+        num_train_epochs=3,
+        per_device_train_batch_size=2,
+        gradient_accumulation_steps=gradient_accumulation_steps,
+        save_steps=10,
+        save_total_limit=2,
+        logging_dir='./logs',
+        logging_steps=10,
+        use_cpu=True,
+        # gloo when launched with torchrun (one process per core group); a plain
+        # single-process run must not request a process group
+        ddp_backend='gloo' if int(os.environ.get("WORLD_SIZE", 1)) > 1 else None,
+        ddp_find_unused_parameters=False,
+        remove_unused_columns=False,  # Keep segment_ids for packed_collate
+    )
+
+def find_resume_checkpoint(output_dir, resume):
+    """Last checkpoint in output_dir when resuming an interrupted run, else None"""
+    if not resume or not os.path.isdir(output_dir):
+        return None
+    return get_last_checkpoint(output_dir)
+
+def steps_trained(trainer, checkpoint):
+    """Optimizer steps run by this process (a resumed run skips the checkpoint's steps)"""
+    start_step = int(checkpoint.rsplit('-', 1)[-1]) if checkpoint else 0
+    return trainer.state.global_step - start_step
 
 # Initialize the Trainer (only when training)
-def train_model():
-    train_dataset = get_train_dataset(tokenizer)
+def train_model(packed=False, gradient_accumulation_steps=1, resume=False):
+    if not packed:
+        train_dataset = get_train_dataset(tokenizer)
+        args = get_training_args(gradient_accumulation_steps)
+        trainer = Trainer(
+            model=model,
+            args=args,
+            train_dataset=train_dataset,
+        )
+        trainer.train(resume_from_checkpoint=find_resume_checkpoint(args.output_dir, resume))
+        model.save_pretrained('./fine_tuned_model')
+        tokenizer.save_pretrained('./fine_tuned_model')
+        return
+
+    # Split the cores between the data-parallel processes started by torchrun
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+
+    train_dataset = PackedMedicalDataset(load_dataset(), tokenizer)
+    args = get_packed_training_args(gradient_accumulation_steps)
     trainer = Trainer(
         model=model,
-        args=training_args,
+        args=args,
         train_dataset=train_dataset,
+        data_collator=packed_collate,
     )
-    trainer.train()
-    model.save_pretrained('./fine_tuned_model')
-    tokenizer.save_pretrained('./fine_tuned_model')
+    last_checkpoint = find_resume_checkpoint(args.output_dir, resume)
+    result = trainer.train(resume_from_checkpoint=last_checkpoint)
+    trainer.save_model('./fine_tuned_model')
+
+    if trainer.is_world_process_zero():
+        tokenizer.save_pretrained('./fine_tuned_model')
+        runtime = result.metrics['train_runtime']
+        padded_tokens = len(train_dataset) * train_dataset.max_length
+        print(f"Packed {train_dataset.num_pairs} pairs into {len(train_dataset)} sequences "
+              f"({train_dataset.num_tokens / padded_tokens:.1%} non-padding tokens)")
+        print(f"Processes: {world_size}, resumed from: {last_checkpoint or 'scratch'}")
+        steps = steps_trained(trainer, last_checkpoint)
+        if steps <= 0:
+            print("No steps left to train; the checkpoint already covers every epoch")
+            return
+        # Throughput over the part of the run this process actually trained
+        epochs = args.num_train_epochs * steps / trainer.state.max_steps
+        print(f"Steps trained: {steps} of {trainer.state.max_steps}")
+        print(f"Samples/sec: {train_dataset.num_pairs * epochs / runtime:.2f} pairs "
+              f"({len(train_dataset) * epochs / runtime:.2f} packed sequences)")
+        print(f"Tokens/sec: {train_dataset.num_tokens * epochs / runtime:.1f}")
+
+# Low-rank adapters (LoRA): only small adapter matrices are trained and saved,
+# one directory per adapter under ADAPTER_DIR, all sharing the same base model
+ADAPTER_DIR = './adapters'
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def get_adapter_training_args(adapter, packed=False, gradient_accumulation_steps=1):
+    return TrainingArguments(
+        output_dir=f'./results_adapter_{adapter}',
+        num_train_epochs=3,
+        per_device_train_batch_size=2,
+        gradient_accumulation_steps=gradient_accumulation_steps,
+        learning_rate=2e-4,  # Adapters train from zero and need a higher rate than full fine-tuning
+        save_steps=10,
+        save_total_limit=2,
+        logging_dir='./logs',
+        logging_steps=10,
+        use_cpu=True,
+        ddp_backend='gloo' if int(os.environ.get("WORLD_SIZE", 1)) > 1 else None,
+        ddp_find_unused_parameters=False,
+        remove_unused_columns=not packed,
+    )
+
+def train_adapter(adapter, packed=False, gradient_accumulation_steps=1, rank=8, target_modules=None, resume=False):
+    if get_peft_model is None:
+        raise ImportError("Adapter training needs the peft package (pip install peft)")
+
+    # target_modules=None uses peft's default attention projections for the model type
+    lora_config = LoraConfig(task_type="CAUSAL_LM", r=rank, lora_alpha=rank * 2, lora_dropout=0.05,
+                             target_modules=target_modules)
+    adapter_model = get_peft_model(model, lora_config)
+    trainable = sum(p.numel() for p in adapter_model.parameters() if p.requires_grad)
+    total = sum(p.numel() for p in adapter_model.parameters())
+
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
 
-# Train the model only if this file is run directly for training
+    if packed:
+        train_dataset = PackedMedicalDataset(load_dataset(), tokenizer)
+        data_collator = packed_collate
+    else:
+        train_dataset = get_train_dataset(tokenizer)
+        data_collator = None
+    args = get_adapter_training_args(adapter, packed, gradient_accumulation_steps)
+    trainer = Trainer(
+        model=adapter_model,
+        args=args,
+        train_dataset=train_dataset,
+        data_collator=data_collator,
+    )
+    last_checkpoint = find_resume_checkpoint(args.output_dir, resume)
+    result = trainer.train(resume_from_checkpoint=last_checkpoint)
+
+    if trainer.is_world_process_zero():
+        adapter_path = os.path.join(ADAPTER_DIR, adapter)
+        adapter_model.save_pretrained(adapter_path)  # Adapter weights and config only
+        base_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+        print(f"Adapter '{adapter}': {trainable:,} of {total:,} parameters trainable ({trainable / total:.2%})")
+        steps = steps_trained(trainer, last_checkpoint)
+        runtime = result.metrics['train_runtime']
+        samples = len(train_dataset) * args.num_train_epochs * max(steps, 0) / trainer.state.max_steps
+        print(f"Training time: {runtime:.1f}s for {steps} of {trainer.state.max_steps} steps "
+              f"(resumed from: {last_checkpoint or 'scratch'}), {samples / runtime:.2f} samples/sec")
+        print(f"Adapter size: {directory_size(adapter_path) / 2**20:.2f} MiB in {adapter_path} "
+              f"(full model: {base_bytes / 2**20:.0f} MiB)")
+
+# Train the model only if this file is run directly for training.
+# PACKED_TRAINING=1 enables sequence packing; run it under
+# `torchrun --nproc_per_node=<N> models.py` for data-parallel CPU training.
+# RESUME_TRAINING=1 continues an interrupted run from its last checkpoint.
+# LORA_ADAPTER=<name> trains a low-rank adapter instead of the full model.
 if __name__ == "__main__" and not os.environ.get("RUN_INFERENCE"):
-    train_model()
+    if os.environ.get("LORA_ADAPTER"):
+        train_adapter(
+            os.environ["LORA_ADAPTER"],
+            packed=os.environ.get("PACKED_TRAINING") == "1",
+            gradient_accumulation_steps=int(os.environ.get("GRAD_ACCUM_STEPS", 1)),
+            rank=int(os.environ.get("LORA_RANK", 8)),
+            target_modules=os.environ["LORA_TARGET_MODULES"].split(",") if os.environ.get("LORA_TARGET_MODULES") else None,
+            resume=os.environ.get("RESUME_TRAINING") == "1",
+        )
+    else:
+        train_model(
+            packed=os.environ.get("PACKED_TRAINING") == "1",
+            gradient_accumulation_steps=int(os.environ.get("GRAD_ACCUM_STEPS", 1)),
+            resume=os.environ.get("RESUME_TRAINING") == "1",
+        )
+
+# Function to load model for inference (loaded once and kept resident)
+# lru_cache does not stop two threads from both computing the first value, so
+# first loads go through model_load_lock (the LLM tier runs in worker threads)
+model_load_lock = threading.RLock()
 
-# Function to load model for inference
 def load_model():
+    with model_load_lock:
+        return _load_model()
+
+@lru_cache(maxsize=1)
+def _load_model():
     model_path = './fine_tuned_model'
     if os.path.exists(model_path):
         try:
@@ -107,9 +348,157 @@ def load_model():
     print("Using base model for inference")
     return model, tokenizer
 
-def generate_response(prompt, max_length=100):
-    # Load the model only when needed
-    inference_model, inference_tokenizer = load_model()
+# Adapters at inference: the base model stays resident, every adapter in
+# ADAPTER_DIR is attached to it once, and a request only switches which one is
+# active (or switches adapters off for the base model). That is shared model
+# state, so adapter_gate lets any number of requests for the active setting
+# generate concurrently, and a request for another setting waits until those
+# finish. When the model is idle it switches to the setting of the oldest
+# waiting request, and every request already queued for that setting enters
+# with it; later arrivals do not overtake requests queued for other settings,
+# so a busy adapter cannot starve the others.
+class AdapterGate:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.active = None       # Adapter name, or None for the base model
+        self.in_flight = 0       # Requests generating with `active`
+        self.queue = deque()     # (ticket, adapter) of waiting requests, oldest first
+        self.next_ticket = 0
+        self.batch_end = 0       # Requests with a lower ticket were queued before the last switch
+
+    def can_enter(self, ticket, adapter):
+        if self.in_flight and self.active != adapter:
+            return False
+        if self.active == adapter and ticket < self.batch_end:
+            return True
+        for queued, queued_adapter in self.queue:
+            if queued == ticket:
+                return True
+            if queued_adapter != adapter:
+                return False
+        return True
+
+    @contextmanager
+    def use(self, adapter_model, adapter):
+        start = time.perf_counter()
+        with self.condition:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            self.queue.append((ticket, adapter))
+            while not self.can_enter(ticket, adapter):
+                self.condition.wait()
+            self.queue.remove((ticket, adapter))
+            if self.active != adapter:
+                self.switch(adapter_model, adapter)
+                self.batch_end = self.next_ticket
+                # Requests queued for this setting may now enter too
+                self.condition.notify_all()
+            self.in_flight += 1
+            waited = time.perf_counter() - start
+            adapter_stats["wait_seconds_total"] += waited
+            adapter_stats["wait_seconds_max"] = max(adapter_stats["wait_seconds_max"], waited)
+            adapter_stats["requests"] += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.in_flight -= 1
+                if self.in_flight == 0:
+                    self.condition.notify_all()
+
+    def switch(self, adapter_model, adapter):
+        start = time.perf_counter()
+        if adapter is None:
+            adapter_model.base_model.disable_adapter_layers()
+        else:
+            if self.active is None:
+                adapter_model.base_model.enable_adapter_layers()
+            adapter_model.set_adapter(adapter)
+        self.active = adapter
+        elapsed = time.perf_counter() - start
+        adapter_stats["swaps"] += 1
+        adapter_stats["swap_seconds_total"] += elapsed
+        adapter_stats["swap_seconds_max"] = max(adapter_stats["swap_seconds_max"], elapsed)
+
+adapter_gate = AdapterGate()
+adapter_stats = {"loaded": {}, "swaps": 0, "swap_seconds_total": 0.0, "swap_seconds_max": 0.0,
+                 "requests": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+def load_adapters():
+    """The base model with all adapters in ADAPTER_DIR attached, or None if there are none"""
+    with model_load_lock:
+        return _load_adapters()
+
+@lru_cache(maxsize=1)
+def _load_adapters():
+    if PeftModel is None or not os.path.isdir(ADAPTER_DIR):
+        return None
+    adapter_model = None
+    for name in sorted(os.listdir(ADAPTER_DIR)):
+        path = os.path.join(ADAPTER_DIR, name)
+        if not os.path.isfile(os.path.join(path, 'adapter_config.json')):
+            continue
+        start = time.perf_counter()
+        try:
+            if adapter_model is None:
+                adapter_model = PeftModel.from_pretrained(model, path, adapter_name=name)
+                adapter_model.eval()
+                adapter_gate.active = name
+            else:
+                adapter_model.load_adapter(path, adapter_name=name)
+        except Exception as e:
+            print(f"Error loading adapter {name}: {e}")
+            continue
+        adapter_stats["loaded"][name] = {
+            "size_bytes": directory_size(path),
+            "load_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+    return adapter_model
+
+def adapter_names():
+    return list(adapter_stats["loaded"]) if load_adapters() is not None else []
+
+@contextmanager
+def inference_model_for(adapter=None):
+    """Yield (model, tokenizer) with `adapter` active, or without any adapter if None"""
+    if adapter is None:
+        inference_model, inference_tokenizer = load_model()
+        # Adapters are injected into the base model, so they must be switched off
+        # when the base model itself serves the request
+        adapter_model = load_adapters()
+        if adapter_model is None or inference_model is not model:
+            yield inference_model, inference_tokenizer
+            return
+        with adapter_gate.use(adapter_model, None):
+            yield inference_model, inference_tokenizer
+        return
+
+    adapter_model = load_adapters()
+    if adapter_model is None or adapter not in adapter_stats["loaded"]:
+        raise ValueError(f"Unknown adapter: {adapter}")
+    with adapter_gate.use(adapter_model, adapter):
+        yield adapter_model, tokenizer
+
+def get_adapter_stats():
+    swaps = adapter_stats["swaps"]
+    requests = adapter_stats["requests"]
+    return {
+        "adapters": adapter_stats["loaded"],
+        "active": adapter_gate.active,
+        "in_flight": adapter_gate.in_flight,
+        "waiting": len(adapter_gate.queue),
+        "swaps": swaps,
+        "avg_swap_ms": round(adapter_stats["swap_seconds_total"] / swaps * 1000, 4) if swaps else 0.0,
+        "max_swap_ms": round(adapter_stats["swap_seconds_max"] * 1000, 4),
+        "avg_wait_ms": round(adapter_stats["wait_seconds_total"] / requests * 1000, 4) if requests else 0.0,
+        "max_wait_ms": round(adapter_stats["wait_seconds_max"] * 1000, 4),
+    }
+
+def generate_response(prompt, max_length=100, adapter=None):
+    with inference_model_for(adapter) as (inference_model, inference_tokenizer):
+        return _generate_response(inference_model, inference_tokenizer, prompt, max_length)
+
+def _generate_response(inference_model, inference_tokenizer, prompt, max_length):
     inputs = inference_tokenizer(prompt, return_tensors='pt')
     outputs = inference_model.generate(
         inputs['input_ids'],
@@ -120,14 +509,49 @@ def generate_response(prompt, max_length=100):
     response = inference_tokenizer.decode(outputs[0], skip_special_tokens=True)
     return response
 
+# Like generate_response, plus a confidence score: the mean probability the
+# model assigned to each token it generated
+def generate_response_with_confidence(prompt, max_length=100, adapter=None):
+    with inference_model_for(adapter) as (inference_model, inference_tokenizer):
+        return _generate_response_with_confidence(inference_model, inference_tokenizer, prompt, max_length)
+
+def _generate_response_with_confidence(inference_model, inference_tokenizer, prompt, max_length):
+    inputs = inference_tokenizer(prompt, return_tensors='pt')
+    with torch.no_grad():
+        outputs = inference_model.generate(
+            inputs['input_ids'],
+            max_length=max_length,
+            num_return_sequences=1,
+            pad_token_id=inference_tokenizer.eos_token_id,
+            output_scores=True,
+            return_dict_in_generate=True
+        )
+    # Only the generated tokens: the sequence also contains the prompt
+    generated = outputs.sequences[0][inputs['input_ids'].shape[1]:]
+    response = inference_tokenizer.decode(generated, skip_special_tokens=True).strip()
+    if not outputs.scores:
+        return response, 0.0
+    probs = [torch.softmax(score[0], dim=-1)[token].item() for score, token in zip(outputs.scores, generated)]
+    return response, sum(probs) / len(probs)
+
+WAV2VEC2_MODEL = "AndersenC4/wav2vec2-medical"
+SAMPLE_RATE = 16000
+CTC_FRAME_SAMPLES = 320  # wav2vec2 emits one CTC frame per 20 ms of 16 kHz audio
+
+# Load the wav2vec2 model and processor once per process
+@lru_cache(maxsize=1)
+def load_wav2vec2():
+    wav2vec2_model = Wav2Vec2ForCTC.from_pretrained(WAV2VEC2_MODEL)
+    wav2vec2_model.eval()
+    wav2vec2_processor = Wav2Vec2Processor.from_pretrained(WAV2VEC2_MODEL)
+    return wav2vec2_model, wav2vec2_processor
+
 # Function to transcribe audio using wav2vec2-medical
 def transcribe_audio(audio_path):
-    # Load the wav2vec2 model and processor
-    wav2vec2_model = Wav2Vec2ForCTC.from_pretrained("AndersenC4/wav2vec2-medical")
-    wav2vec2_processor = Wav2Vec2Processor.from_pretrained("AndersenC4/wav2vec2-medical")
+    wav2vec2_model, wav2vec2_processor = load_wav2vec2()
 
     # Load audio file
-    audio, rate = librosa.load(audio_path, sr=16000)
+    audio, rate = librosa.load(audio_path, sr=SAMPLE_RATE)
 
     # Process audio
     inputs = wav2vec2_processor(audio, sampling_rate=rate, return_tensors="pt", padding=True)
@@ -140,6 +564,121 @@ def transcribe_audio(audio_path):
     predicted_ids = torch.argmax(logits, dim=-1)
     transcription = wav2vec2_processor.batch_decode(predicted_ids)
     return transcription
+
+# Long-audio mode: the file is decoded and resampled block by block and cut
+# into overlapping windows, so memory stays bounded by the window size
+# instead of growing with the length of the recording.
+# Block-wise decoding (librosa.stream) only works for formats libsndfile reads
+# (wav, flac, ogg, mp3 with libsndfile 1.1+). Anything else, e.g. m4a/aac, is
+# decoded whole through librosa's audioread/ffmpeg fallback and then cut into
+# blocks, so for those files memory grows with the length of the recording.
+def stream_audio(audio_path, block_seconds=5):
+    """Yield the audio as 16 kHz mono float32 blocks of about `block_seconds`"""
+    try:
+        native_rate = soundfile.info(audio_path).samplerate
+    except RuntimeError as e:  # soundfile.LibsndfileError: format not supported by libsndfile
+        print(f"Warning: {audio_path} cannot be streamed ({e}); decoding the whole file instead.")
+        audio, _ = librosa.load(audio_path, sr=SAMPLE_RATE, mono=True)
+        block = block_seconds * SAMPLE_RATE
+        for start in range(0, len(audio), block):
+            yield audio[start:start + block].astype(np.float32)
+        return
+    hop_length = native_rate // 10
+    blocks = librosa.stream(audio_path, block_length=block_seconds * 10,
+                            frame_length=hop_length, hop_length=hop_length, mono=True)
+    if native_rate == SAMPLE_RATE:
+        for block in blocks:
+            yield block.astype(np.float32)
+        return
+    # One stateful resampler for the whole file: resampling blocks independently
+    # would put filter edge artifacts at every block boundary
+    resampler = soxr.ResampleStream(native_rate, SAMPLE_RATE, 1, dtype='float32')
+    for block in blocks:
+        block = resampler.resample_chunk(block.astype(np.float32))
+        if len(block):
+            yield block
+    tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+    if len(tail):
+        yield tail
+
+def find_silence_cut(buffer, window, overlap):
+    """Pick a window end so that the middle of the overlap falls on the quietest
+    20 ms frame in the last quarter of the window"""
+    search_start = max(window * 3 // 4, 2 * overlap)
+    rms = librosa.feature.rms(y=buffer[search_start:window], frame_length=CTC_FRAME_SAMPLES * 2,
+                              hop_length=CTC_FRAME_SAMPLES, center=False)[0]
+    if len(rms) == 0:
+        return window
+    quietest = search_start + int(np.argmin(rms)) * CTC_FRAME_SAMPLES
+    return min(window, quietest + overlap // 2)
+
+def split_audio_windows(blocks, window_seconds=30, overlap_seconds=2, split_on_silence=True):
+    """Yield (start_sample, samples) windows overlapping by `overlap_seconds`"""
+    window = int(window_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    if window <= 4 * overlap:
+        raise ValueError("window_seconds must be more than 4x overlap_seconds.")
+
+    buffer = np.zeros(0, dtype=np.float32)
+    start = 0
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            end = find_silence_cut(buffer, window, overlap) if split_on_silence else window
+            yield start, buffer[:end]
+            start += end - overlap
+            buffer = buffer[end - overlap:]
+    # The tail, unless it is only the overlap already covered by the previous window
+    if len(buffer) > 0 and (start == 0 or len(buffer) > overlap):
+        yield start, buffer
+
+def transcribe_window(samples):
+    wav2vec2_model, wav2vec2_processor = load_wav2vec2()
+    inputs = wav2vec2_processor(samples, sampling_rate=SAMPLE_RATE, return_tensors="pt")
+    with torch.no_grad():
+        logits = wav2vec2_model(inputs.input_values).logits
+    return torch.argmax(logits, dim=-1)[0]
+
+def transcribe_windows(audio_path, window_seconds=30, overlap_seconds=2, workers=2, split_on_silence=True):
+    """Yield (start_sec, end_sec, predicted_ids) per window, in order.
+
+    Windows are transcribed in parallel by `workers` threads, with at most
+    `workers + 1` windows in memory. CTC frames are stitched at the middle of
+    each overlap: half of the overlap is dropped from each neighbouring window.
+    """
+    trim_frames = int(overlap_seconds * SAMPLE_RATE) // 2 // CTC_FRAME_SAMPLES
+    windows = split_audio_windows(stream_audio(audio_path), window_seconds, overlap_seconds, split_on_silence)
+
+    def stitched(start, length, future, last):
+        ids = future.result()
+        left = 0 if start == 0 else trim_frames
+        right = len(ids) if last else max(left, len(ids) - trim_frames)
+        return start / SAMPLE_RATE, (start + length) / SAMPLE_RATE, ids[left:right]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, samples in windows:
+            pending.append((start, len(samples), executor.submit(transcribe_window, samples)))
+            if len(pending) > workers:
+                yield stitched(*pending.popleft(), last=False)
+        while pending:
+            item = pending.popleft()
+            yield stitched(*item, last=not pending)
+
+def transcribe_audio_stream(audio_path, **kwargs):
+    """Yield partial transcripts ({"start", "end", "text"}) as each window is decoded"""
+    _, wav2vec2_processor = load_wav2vec2()
+    for start, end, ids in transcribe_windows(audio_path, **kwargs):
+        yield {"start": round(start, 2), "end": round(end, 2), "text": wav2vec2_processor.decode(ids)}
+
+def transcribe_long_audio(audio_path, **kwargs):
+    """Same output as transcribe_audio, for recordings of any length"""
+    _, wav2vec2_processor = load_wav2vec2()
+    ids = [window_ids for _, _, window_ids in transcribe_windows(audio_path, **kwargs)]
+    if not ids:
+        return [""]
+    return [wav2vec2_processor.decode(torch.cat(ids))]
+
 # Example usage for inference
 if __name__ == "__main__" and os.environ.get("RUN_INFERENCE") == "1":
     prompt = "What are the symptoms of flu?"
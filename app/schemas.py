@@ -0,0 +1,118 @@
+# Request/response models shared by the FastAPI routers (main.py, backends.py)
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+# Requests
+class ChatMessage(BaseModel):
+    role: Literal["user", "assistant", "system"]
+    content: str
+
+class ChatRequest(BaseModel):
+    input: str = Field(..., min_length=1)
+    use_openai: bool = False
+    openai_api_key: Optional[str] = None
+    history: List[ChatMessage] = []
+    session_id: Optional[str] = None
+    adapter: Optional[str] = None  # LoRA adapter for the local LLM tier, e.g. "id" or "gizi"
+
+class DietSuggestionRequest(BaseModel):
+    input: str = Field(..., min_length=1)
+
+class DietRequest(BaseModel):
+    berat_badan: float = Field(..., gt=0)
+    tinggi_badan: float = Field(..., gt=0)
+    usia: int = Field(..., gt=0)
+    jenis_kelamin: Literal["Pria", "Wanita"]
+    aktivitas: Literal["Sangat Jarang", "Ringan", "Sedang", "Aktif", "Sangat Aktif"]
+    tujuan: Literal["Menurunkan Berat Badan", "Mempertahankan Berat Badan", "Menambah Berat Badan"]
+
+class FoodItem(BaseModel):
+    name: str
+    portion: float = Field(100, gt=0)
+
+class CaloriesRequest(BaseModel):
+    food_items: List[FoodItem]
+
+class DiagnosisRequest(BaseModel):
+    symptoms: List[str]
+
+class TriageAnswerRequest(BaseModel):
+    session_id: str
+    answer: Literal["yes", "no", "unknown"]
+
+# Responses
+class MessageResponse(BaseModel):
+    message: str
+
+class ChatResponse(BaseModel):
+    response: Dict[str, str]
+    description: str
+    answer: Optional[str] = None
+    tier: Optional[str] = None
+    confidence: Optional[float] = None
+    session_id: Optional[str] = None
+
+class DiseaseResponse(BaseModel):
+    disease: str
+    description: str
+
+class Nutrients(BaseModel):
+    kalori: float
+    protein: float
+    karbohidrat: float
+    lemak: float
+
+class NutritionItem(Nutrients):
+    nama: str
+    porsi: float
+
+class Meal(BaseModel):
+    target_kalori: int
+    items: List[NutritionItem]
+    total: Nutrients
+    dalam_target: bool  # False if no combination of foods and portions is within 5% of the target
+
+class DietResponse(BaseModel):
+    bmi: float
+    status: str
+    kalori_harian: int
+    saran: str
+    meal_plan: Optional[Dict[str, Meal]] = None
+
+class FoodsResponse(BaseModel):
+    foods: Dict[str, Nutrients]
+
+class FoodSearchResult(Nutrients):
+    name: str
+
+class FoodSearchResponse(BaseModel):
+    query: str
+    results: List[FoodSearchResult]
+
+class CaloriesResponse(BaseModel):
+    items: List[NutritionItem]
+    total: Nutrients
+
+class SymptomsResponse(BaseModel):
+    symptoms: List[str]
+
+class DiagnosisResponse(BaseModel):
+    conditions: List[str]
+
+class TriageCondition(DiseaseResponse):
+    probability: float
+
+class TriageResponse(BaseModel):
+    session_id: str
+    question: Optional[str] = None
+    question_label: Optional[str] = None
+    remaining: int
+    done: bool
+    conditions: List[TriageCondition] = []
+
+# backends.py stubs
+class DietSuggestionResponse(BaseModel):
+    diet: str
+
+class CaloriesSummaryResponse(BaseModel):
+    calories: str
@@ -0,0 +1,87 @@
+# orjson response class and per-endpoint serialization timing
+from contextvars import ContextVar
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+import asyncio
+import functools
+import orjson
+import time
+
+# endpoint name -> {"count", "total", "max"} (seconds)
+serialization_stats = {}
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson. Bytes content is assumed to be
+    pre-encoded JSON and is sent as-is."""
+
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def record_serialization(endpoint, seconds):
+    stats = serialization_stats.setdefault(endpoint, {"count": 0, "total": 0.0, "max": 0.0})
+    stats["count"] += 1
+    stats["total"] += seconds
+    stats["max"] = max(stats["max"], seconds)
+
+def get_serialization_stats():
+    return {
+        endpoint: {
+            "count": stats["count"],
+            "avg_ms": round(stats["total"] / stats["count"] * 1000, 4),
+            "max_ms": round(stats["max"] * 1000, 4),
+            "total_ms": round(stats["total"] * 1000, 4),
+        }
+        for endpoint, stats in serialization_stats.items()
+    }
+
+# Set by TimedRoute per request; the wrapped endpoint stores the time it returned
+endpoint_returned = ContextVar("endpoint_returned", default=None)
+
+def mark_returned():
+    returned = endpoint_returned.get()
+    if returned is not None:
+        returned[0] = time.perf_counter()
+
+def timed_endpoint(endpoint):
+    """Wrap an endpoint so it records when it returned (signature is kept for FastAPI)"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            mark_returned()
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            mark_returned()
+            return result
+    return wrapper
+
+class TimedRoute(APIRoute):
+    """Route class that records how long it took to turn the endpoint's return
+    value into a response: response_model validation and serialization plus
+    encoding the body."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        # Keyed by endpoint name: the route's path may not include the router prefix
+        endpoint = self.name
+
+        async def timed_handler(request):
+            returned = [None]
+            token = endpoint_returned.set(returned)
+            try:
+                response = await handler(request)
+            finally:
+                endpoint_returned.reset(token)
+            if returned[0] is not None:
+                record_serialization(endpoint, time.perf_counter() - returned[0])
+            return response
+
+        return timed_handler
@@ -0,0 +1,160 @@
+# Shared health logic used by the FastAPI backend (main.py).
+# The Streamlit UI (uiux.py) no longer runs this in-process; it calls the API.
+
+DEFAULT_RESPONSE = "Maaf, saya tidak memiliki informasi tentang hal tersebut. Silakan konsultasikan dengan dokter."
+
+# Sample food database with calories (per 100g)
+FOOD_DATA = {
+    'Nasi Putih': {'kalori': 130, 'protein': 2.7, 'karbohidrat': 28, 'lemak': 0.3},
+    'Ayam Dada': {'kalori': 165, 'protein': 31, 'karbohidrat': 0, 'lemak': 3.6},
+    'Telur': {'kalori': 155, 'protein': 13, 'karbohidrat': 1.1, 'lemak': 11},
+    'Tempe': {'kalori': 193, 'protein': 19, 'karbohidrat': 9.4, 'lemak': 11},
+    'Tahu': {'kalori': 76, 'protein': 8, 'karbohidrat': 1.9, 'lemak': 4.8},
+    'Sayur Bayam': {'kalori': 23, 'protein': 2.9, 'karbohidrat': 3.6, 'lemak': 0.4},
+    'Apel': {'kalori': 52, 'protein': 0.3, 'karbohidrat': 14, 'lemak': 0.2},
+    'Pisang': {'kalori': 89, 'protein': 1.1, 'karbohidrat': 23, 'lemak': 0.3},
+    'Ikan Salmon': {'kalori': 208, 'protein': 22, 'karbohidrat': 0, 'lemak': 13},
+    'Kentang': {'kalori': 77, 'protein': 2, 'karbohidrat': 17, 'lemak': 0.1}
+}
+
+# Faktor aktivitas
+AKTIVITAS_FAKTOR = {
+    "Sangat Jarang": 1.2,
+    "Ringan": 1.375,
+    "Sedang": 1.55,
+    "Aktif": 1.725,
+    "Sangat Aktif": 1.9
+}
+
+COMMON_CONDITIONS = {
+    'Demam': ['demam', 'menggigil', 'sakit kepala', 'lemas'],
+    'Flu': ['demam', 'hidung tersumbat', 'bersin', 'batuk', 'sakit tenggorokan'],
+    'Migrain': ['sakit kepala berdenyut', 'mual', 'sensitif cahaya', 'sensitif suara'],
+    'Maag': ['nyeri perut', 'mual', 'kembung', 'tidak nafsu makan'],
+    'Alergi': ['bersin', 'gatal', 'ruam kulit', 'mata berair']
+}
+
+SYMPTOMS = [
+    'demam', 'menggigil', 'sakit kepala', 'lemas',
+    'hidung tersumbat', 'bersin', 'batuk', 'sakit tenggorokan',
+    'sakit kepala berdenyut', 'mual', 'sensitif cahaya', 'sensitif suara',
+    'nyeri perut', 'kembung', 'tidak nafsu makan',
+    'gatal', 'ruam kulit', 'mata berair'
+]
+
+SYSTEM_PROMPT = "Kamu adalah HealthierBot, asisten kesehatan yang membantu memberikan informasi medis. Kamu memberikan informasi yang akurat dan mudah dipahami. Kamu BUKAN dokter dan selalu menyarankan pengguna untuk berkonsultasi dengan profesional medis untuk diagnosis dan pengobatan."
+
+# Function untuk memberikan saran diet
+def get_diet_recommendation(berat_badan, tinggi_badan, usia, jenis_kelamin, aktivitas, tujuan):
+    # Menghitung BMI
+    tinggi_m = tinggi_badan / 100
+    bmi = berat_badan / (tinggi_m * tinggi_m)
+
+    # Menghitung BMR (Basal Metabolic Rate) dengan rumus Harris-Benedict
+    if jenis_kelamin == "Pria":
+        bmr = 88.362 + (13.397 * berat_badan) + (4.799 * tinggi_badan) - (5.677 * usia)
+    else:
+        bmr = 447.593 + (9.247 * berat_badan) + (3.098 * tinggi_badan) - (4.330 * usia)
+
+    # Total kebutuhan kalori
+    total_kalori = bmr * AKTIVITAS_FAKTOR[aktivitas]
+
+    # Menyesuaikan dengan tujuan
+    if tujuan == "Menurunkan Berat Badan":
+        total_kalori *= 0.8  # Defisit 20%
+    elif tujuan == "Menambah Berat Badan":
+        total_kalori *= 1.2  # Surplus 20%
+
+    # Membuat rekomendasi berdasarkan BMI
+    if bmi < 18.5:
+        status = "Berat badan kurang"
+        saran = "Fokus pada makanan bergizi tinggi dan protein untuk membangun massa otot."
+    elif bmi < 25:
+        status = "Berat badan normal"
+        saran = "Pertahankan pola makan seimbang dengan variasi makanan yang beragam."
+    elif bmi < 30:
+        status = "Berat badan berlebih"
+        saran = "Kurangi asupan kalori dan tingkatkan aktivitas fisik."
+    else:
+        status = "Obesitas"
+        saran = "Konsultasikan dengan dokter atau ahli gizi untuk program penurunan berat badan yang aman."
+
+    return {
+        'bmi': round(bmi, 2),
+        'status': status,
+        'kalori_harian': round(total_kalori),
+        'saran': saran
+    }
+
+# Function untuk menghitung nutrisi sesuai porsi (gram)
+def calculate_nutrition(food_name, portion, food_data=FOOD_DATA):
+    food_info = food_data.get(food_name)
+    if food_info is None:
+        return None
+    return {
+        'nama': food_name,
+        'porsi': portion,
+        'kalori': round((food_info['kalori'] * portion) / 100, 1),
+        'protein': round((food_info['protein'] * portion) / 100, 1),
+        'karbohidrat': round((food_info['karbohidrat'] * portion) / 100, 1),
+        'lemak': round((food_info['lemak'] * portion) / 100, 1)
+    }
+
+# Function untuk mendiagnosis gejala sederhana
+def diagnose_symptoms(selected_symptoms):
+    possible_conditions = []
+    for condition, symptoms in COMMON_CONDITIONS.items():
+        matching_symptoms = len(set(selected_symptoms) & set(symptoms))
+        if matching_symptoms >= 2:  # Jika minimal 2 gejala cocok
+            possible_conditions.append(condition)
+
+    return possible_conditions
+
+# Function to find the best matching dataset entry, with a confidence score
+def match_dataset(prompt, chat_data):
+    prompt = prompt.lower()
+    keyword_match = None
+
+    # Check for disease information
+    for item in chat_data:
+        if "prompt" in item and "response" in item:
+            if prompt in item["prompt"].lower() or item["prompt"].lower() in prompt:
+                return item["response"], 0.9
+
+            # Check for keywords (a weaker signal than a prompt match)
+            if keyword_match is None:
+                keywords = ["apa", "bagaimana", "mengobati", "gejala", "penyakit", "sakit"]
+                for keyword in keywords:
+                    if keyword in prompt and keyword in item["prompt"].lower():
+                        keyword_match = item["response"]
+                        break
+
+    if keyword_match is not None:
+        return keyword_match, 0.4
+    return DEFAULT_RESPONSE, 0.0
+
+# Function to get response based on medical dataset
+def get_response_from_dataset(prompt, chat_data):
+    return match_dataset(prompt, chat_data)[0]
+
+# Function to ask OpenAI; raises on any API error
+def ask_openai(user_input, history, api_key):
+    from openai import OpenAI
+    client = OpenAI(api_key=api_key)
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+    # Add chat history
+    for message in history:
+        messages.append({"role": message["role"], "content": message["content"]})
+
+    # Add current prompt
+    messages.append({"role": "user", "content": user_input})
+
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=messages,
+        max_tokens=500,
+        temperature=0.7
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,250 @@
+# Bounded server-side conversation store for /api/chat
+from collections import OrderedDict
+import gzip
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Approximate per-object overhead (bytes) on top of the stored text
+SESSION_OVERHEAD = 400
+TURN_OVERHEAD = 100
+
+ROLES = ("user", "assistant")
+
+SWEEP_INTERVAL = 60  # Seconds between scans of spill_dir for expired files
+
+class Session:
+    __slots__ = ("turns", "size", "last_access")
+
+    def __init__(self, turns=None):
+        # Compact form: (role index, UTF-8 text) per turn
+        self.turns = turns or []
+        self.size = SESSION_OVERHEAD + sum(TURN_OVERHEAD + len(text) for _, text in self.turns)
+        self.last_access = time.monotonic()
+
+class SessionStore:
+    """Recent turns per conversation, keyed by session ID.
+
+    Sessions are kept in LRU order. A session idle for longer than `ttl`
+    seconds is dropped, and the least recently used sessions are evicted
+    whenever the resident size goes over `max_bytes`. If `spill_dir` is set,
+    evicted sessions are written there (gzip JSON) and reloaded on next use;
+    spilled files idle for longer than `ttl` are deleted.
+
+    The methods do blocking file I/O when spilling is enabled, so async code
+    should call them in a thread. The I/O itself runs outside the lock.
+    """
+
+    def __init__(self, max_bytes, ttl, max_turns, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.spill_dir = spill_dir
+        self.sessions = OrderedDict()
+        self.spilling = {}  # session_id -> Session evicted but not yet written to disk
+        self.restoring = {}  # session_id -> Event set once its file has been read back
+        self.resident_bytes = 0
+        self.created = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        self.spilled = 0
+        self.restored = 0
+        self.expired_spilled = 0
+        self.started = time.monotonic()
+        self.last_sweep = self.started
+        self.lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def new_session_id(self):
+        return uuid.uuid4().hex
+
+    def get_history(self, session_id):
+        """Return the stored turns as [{"role", "content"}], oldest first"""
+        self._restore(session_id)
+        with self.lock:
+            session = self._get(session_id)
+            history = [] if session is None else [
+                {"role": ROLES[role], "content": text.decode("utf-8")} for role, text in session.turns
+            ]
+            evicted = self._evict()  # A session restored from disk may push the store over its cap
+        self._spill(evicted)
+        return history
+
+    def append(self, session_id, role, content):
+        self._restore(session_id)
+        with self.lock:
+            session = self._get(session_id)
+            if session is None:
+                session = Session()
+                self.sessions[session_id] = session
+                self.resident_bytes += session.size
+                self.created += 1
+            text = content.encode("utf-8")
+            session.turns.append((ROLES.index(role), text))
+            added = TURN_OVERHEAD + len(text)
+            while len(session.turns) > self.max_turns:
+                _, dropped = session.turns.pop(0)
+                added -= TURN_OVERHEAD + len(dropped)
+            session.size += added
+            self.resident_bytes += added
+            evicted = self._evict()
+        self._spill(evicted)
+        self._sweep_spilled()
+
+    def _get(self, session_id):
+        session = self.sessions.get(session_id)
+        now = time.monotonic()
+        if session is None and session_id in self.spilling:
+            # Evicted but its file is not written yet; take it back directly
+            session = self.spilling.pop(session_id)
+            self.sessions[session_id] = session
+            self.resident_bytes += session.size
+        if session is not None and now - session.last_access > self.ttl:
+            self._remove(session_id)
+            self.evicted_ttl += 1
+            session = None
+        if session is not None:
+            session.last_access = now
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def _remove(self, session_id):
+        session = self.sessions.pop(session_id)
+        self.resident_bytes -= session.size
+        return session
+
+    def _evict(self):
+        """Drop expired sessions and evict over the cap; return the evicted (session_id, session) to spill"""
+        now = time.monotonic()
+        evicted = []
+        # Oldest access first, so expired sessions are all at the front
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_access > self.ttl:
+                self._remove(session_id)
+                self.evicted_ttl += 1
+            elif self.resident_bytes > self.max_bytes and len(self.sessions) > 1:
+                self._remove(session_id)
+                self.evicted_lru += 1
+                if self.spill_dir:
+                    self.spilling[session_id] = session
+                    evicted.append((session_id, session))
+            else:
+                break
+        return evicted
+
+    def _spill_path(self, session_id):
+        return os.path.join(self.spill_dir, f"{session_id}.json.gz")
+
+    def _spill(self, evicted):
+        for session_id, session in evicted:
+            path = self._spill_path(session_id)
+            try:
+                with gzip.open(path, "wt", encoding="utf-8") as f:
+                    json.dump([[role, text.decode("utf-8")] for role, text in session.turns], f)
+                # The file's mtime is the session's last access, for the TTL
+                last_access = time.time() - (time.monotonic() - session.last_access)
+                os.utime(path, (last_access, last_access))
+            except OSError as e:
+                print(f"Error spilling session {session_id}: {e}")
+            with self.lock:
+                revived = self.spilling.pop(session_id, None) is None
+                if not revived:
+                    self.spilled += 1
+            if revived:
+                # Used again while being written; the resident copy is current
+                self._remove_file(path)
+
+    def _restore(self, session_id):
+        if not self.spill_dir:
+            return
+        with self.lock:
+            if session_id in self.sessions or session_id in self.spilling:
+                return
+            restoring = self.restoring.get(session_id)
+            if restoring is None:
+                self.restoring[session_id] = threading.Event()
+        if restoring is not None:
+            # Another request is reading this session back; use its result
+            restoring.wait()
+            return
+        turns = None
+        try:
+            turns = self._read_spilled(session_id)
+        finally:
+            with self.lock:
+                if turns is not None and session_id not in self.sessions:
+                    session = Session(turns)
+                    self.sessions[session_id] = session
+                    self.resident_bytes += session.size
+                    self.restored += 1
+                self.restoring.pop(session_id).set()
+
+    def _read_spilled(self, session_id):
+        """Turns from the session's spill file (deleting it), or None if absent or expired"""
+        path = self._spill_path(session_id)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                self._remove_file(path)
+                with self.lock:
+                    self.expired_spilled += 1
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                turns = [(role, text.encode("utf-8")) for role, text in json.load(f)]
+            os.remove(path)
+            return turns
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error restoring session {session_id}: {e}")
+            return None
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _sweep_spilled(self):
+        """Delete spilled files idle for longer than ttl, at most once per SWEEP_INTERVAL"""
+        if not self.spill_dir:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_sweep < SWEEP_INTERVAL:
+                return
+            self.last_sweep = now
+        expired = 0
+        cutoff = time.time() - self.ttl
+        try:
+            with os.scandir(self.spill_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json.gz") and entry.stat().st_mtime < cutoff:
+                        self._remove_file(entry.path)
+                        expired += 1
+        except OSError as e:
+            print(f"Error sweeping spilled sessions: {e}")
+        with self.lock:
+            self.expired_spilled += expired
+
+    def stats(self):
+        uptime = time.monotonic() - self.started
+        evictions = self.evicted_lru + self.evicted_ttl
+        return {
+            "sessions": len(self.sessions),
+            "resident_bytes": self.resident_bytes,
+            "max_bytes": self.max_bytes,
+            "created": self.created,
+            "evicted_lru": self.evicted_lru,
+            "evicted_ttl": self.evicted_ttl,
+            "evictions_per_minute": round(evictions / uptime * 60, 3) if uptime > 0 else 0.0,
+            "spilled": self.spilled,
+            "restored": self.restored,
+            "expired_spilled": self.expired_spilled,
+        }
@@ -0,0 +1,70 @@
+# Pre-rendered, precompressed responses for content that only changes with the dataset
+from fastapi import Response
+import gzip
+import hashlib
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_CONTROL = "public, max-age=3600"
+
+def parse_accept_encoding(header):
+    """Return the set of encodings the client accepts (q > 0)"""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+class PrecompressedPayload:
+    """A JSON payload rendered once, stored as identity, gzip and brotli bytes.
+
+    Each encoding has its own strong ETag. A request whose If-None-Match
+    matches gets an empty 304 response.
+    """
+
+    def __init__(self, content):
+        body = orjson.dumps(content)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=11)
+        self.etags = {
+            "identity": f'"{digest}"',
+            "gzip": f'"{digest}-gzip"',
+            "br": f'"{digest}-br"',
+        }
+
+    def select_encoding(self, accept_encoding):
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def response(self, request):
+        encoding = self.select_encoding(request.headers.get("accept-encoding", ""))
+        etag = self.etags[encoding]
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip() for tag in if_none_match.split(",")}
+            tags = {tag[2:] if tag.startswith("W/") else tag for tag in tags}  # Weak comparison
+            if etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.bodies[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,151 @@
+# Adaptive symptom questioning over disease symptom prediction/dataset.csv
+from collections import OrderedDict
+import numpy as np
+import csv
+import time
+import uuid
+
+MIN_GAIN = 0.01          # Bits; a question expected to gain less is not asked
+MIN_PROBABILITY = 0.01   # Diseases below this posterior are no longer candidates
+DONE_PROBABILITY = 0.95  # Stop asking once one disease is this likely
+MAX_CONDITIONS = 5
+
+def symptom_label(symptom):
+    """'skin_rash' -> 'skin rash'"""
+    return " ".join(symptom.replace(" ", "").split("_"))
+
+def entropy_terms(x):
+    """Elementwise x * log2(x), with 0 log 0 = 0"""
+    return np.where(x > 0, x * np.log2(np.where(x > 0, x, 1.0)), 0.0)
+
+class TriageEngine:
+    """Bayesian symptom questioning.
+
+    `frequencies[d, s]` is the share of dataset rows for disease d that list
+    symptom s, i.e. P(yes | d). A session keeps a posterior over diseases
+    (uniform at the start). "yes" multiplies it by P(yes | d), "no" by
+    1 - P(yes | d), "unknown" leaves it unchanged. The next question is the
+    symptom with the lowest expected posterior entropy
+    P(yes) H(d | yes) + P(no) H(d | no), computed for all symptoms at once.
+    """
+
+    def __init__(self, file_path):
+        self.diseases = []
+        self.symptoms = []
+        self.frequencies = np.zeros((0, 0))
+        try:
+            self.load(file_path)
+        except Exception as e:
+            print(f"Error loading triage dataset: {e}")
+        self.prior = np.full(len(self.diseases), 1 / len(self.diseases)) if self.diseases else np.zeros(0)
+        self.first_question = self.next_question(self.prior, frozenset())
+
+    def load(self, file_path):
+        rows_per_disease = {}
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader)  # Header
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                symptoms = {s.strip() for s in row[1:] if s.strip()}
+                rows_per_disease.setdefault(row[0].strip(), []).append(symptoms)
+
+        self.diseases = sorted(rows_per_disease)
+        self.symptoms = sorted(set().union(*(set().union(*rows) for rows in rows_per_disease.values())))
+        self.symptom_index = {symptom: index for index, symptom in enumerate(self.symptoms)}
+        self.frequencies = np.zeros((len(self.diseases), len(self.symptoms)))
+        for d, disease in enumerate(self.diseases):
+            rows = rows_per_disease[disease]
+            for symptoms in rows:
+                for symptom in symptoms:
+                    self.frequencies[d, self.symptom_index[symptom]] += 1
+            self.frequencies[d] /= len(rows)
+
+    def apply(self, posterior, symptom, answer):
+        """Posterior after an answer, or None if the answer rules out every disease"""
+        if answer == "unknown":
+            return posterior
+        likelihood = self.frequencies[:, self.symptom_index[symptom]]
+        updated = posterior * (likelihood if answer == "yes" else 1 - likelihood)
+        total = updated.sum()
+        if total <= 0:
+            return None
+        return updated / total
+
+    def next_question(self, posterior, asked):
+        """Symptom with the highest expected information gain, or None if no question is worth asking"""
+        if posterior.size == 0 or posterior.max() >= DONE_PROBABILITY:
+            return None
+        yes = posterior[:, None] * self.frequencies
+        no = posterior[:, None] * (1 - self.frequencies)
+        p_yes = yes.sum(axis=0)
+        p_no = 1 - p_yes
+        # sum over branches of P(branch) H(d | branch)
+        expected = (entropy_terms(p_yes) - entropy_terms(yes).sum(axis=0)
+                    + entropy_terms(p_no) - entropy_terms(no).sum(axis=0))
+        for symptom in asked:
+            expected[self.symptom_index[symptom]] = np.inf
+        best = int(np.argmin(expected))
+        current = -entropy_terms(posterior).sum()
+        if current - expected[best] < MIN_GAIN:
+            return None
+        return self.symptoms[best]
+
+    def candidates(self, posterior):
+        """[(disease, probability)] above MIN_PROBABILITY, most likely first"""
+        order = np.argsort(-posterior)
+        return [(self.diseases[d], float(posterior[d])) for d in order if posterior[d] >= MIN_PROBABILITY]
+
+class TriageSession:
+    __slots__ = ("posterior", "asked", "question", "last_access")
+
+    def __init__(self, posterior, question):
+        self.posterior = posterior
+        self.asked = set()
+        self.question = question
+        self.last_access = time.monotonic()
+
+class TriageSessions:
+    """Triage sessions keyed by ID, at most `max_sessions`, dropped after `ttl` seconds idle"""
+
+    def __init__(self, engine, max_sessions, ttl, max_questions):
+        self.engine = engine
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_questions = max_questions
+        self.sessions = OrderedDict()
+
+    def start(self):
+        self.evict()
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = TriageSession(self.engine.prior, self.engine.first_question)
+        return session_id, self.sessions[session_id]
+
+    def get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None or time.monotonic() - session.last_access > self.ttl:
+            self.sessions.pop(session_id, None)
+            return None
+        session.last_access = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def answer(self, session, answer):
+        posterior = self.engine.apply(session.posterior, session.question, answer)
+        if posterior is not None:  # An answer that rules out every disease is ignored
+            session.posterior = posterior
+        session.asked.add(session.question)
+        if len(session.asked) >= self.max_questions:
+            session.question = None
+        else:
+            session.question = self.engine.next_question(session.posterior, session.asked)
+
+    def evict(self):
+        now = time.monotonic()
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_access > self.ttl or len(self.sessions) >= self.max_sessions:
+                del self.sessions[session_id]
+            else:
+                break
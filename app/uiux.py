@@ -1,7 +1,12 @@
 import streamlit as st
+from collections import deque
+import httpx
 import json
-import pandas as pd
 import os
+import time
+
+# Per-rerun script time, shown in the sidebar
+rerun_start = time.perf_counter()
 
 # Page configuration - MUST BE THE FIRST STREAMLIT COMMAND
 st.set_page_config(
@@ -76,40 +81,58 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load datasets
-@st.cache_data
-def load_datasets():
+# Backend API configuration
+API_URL = os.getenv("HEALTHIERBOT_API_URL", f"http://127.0.0.1:{os.getenv('PORT', 8000)}")
+HISTORY_PAGE_SIZE = 20  # Jumlah pesan history yang dirender per halaman
+
+@st.cache_resource
+def get_api_client():
+    """Klien HTTP keep-alive yang dipakai bersama oleh semua sesi dan rerun"""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    )
+
+def call_api(method, path, **kwargs):
+    """Memanggil backend FastAPI, menampilkan error jika gagal"""
     try:
-        # Try relative path from app directory
-        with open("../chatbot_medical_dataset.json", "r", encoding='utf-8') as f:
-            chat_data = json.load(f)
-    except FileNotFoundError:
-        # Try from current directory
-        with open("chatbot_medical_dataset.json", "r", encoding='utf-8') as f:
-            chat_data = json.load(f)
-            
+        response = get_api_client().request(method, path, **kwargs)
+        data = response.json()
+    except (httpx.HTTPError, ValueError) as e:
+        st.error(f"Gagal menghubungi server HealthierBot: {str(e)}")
+        return None
+    if response.is_error:
+        st.error(f"Permintaan gagal ({response.status_code}): {data.get('detail') if isinstance(data, dict) else data}")
+        return None
+    return data
+
+# Reference data rarely changes, so cache it between reruns (exceptions are not cached)
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_reference(path):
+    response = get_api_client().get(path)
+    response.raise_for_status()
+    return response.json()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_food_matches(query):
+    response = get_api_client().get("/api/foods/search", params={"q": query, "limit": 20})
+    response.raise_for_status()
+    return [food["name"] for food in response.json()["results"]]
+
+def search_foods(query):
     try:
-        # Try relative path from app directory
-        df_symptom = pd.read_csv("../disease symptom prediction/symptom_Description.csv")
-    except FileNotFoundError:
-        # Try from current directory
-        df_symptom = pd.read_csv("disease symptom prediction/symptom_Description.csv")
-    
-    # Sample food database with calories (per 100g)
-    food_data = {
-        'Nasi Putih': {'kalori': 130, 'protein': 2.7, 'karbohidrat': 28, 'lemak': 0.3},
-        'Ayam Dada': {'kalori': 165, 'protein': 31, 'karbohidrat': 0, 'lemak': 3.6},
-        'Telur': {'kalori': 155, 'protein': 13, 'karbohidrat': 1.1, 'lemak': 11},
-        'Tempe': {'kalori': 193, 'protein': 19, 'karbohidrat': 9.4, 'lemak': 11},
-        'Tahu': {'kalori': 76, 'protein': 8, 'karbohidrat': 1.9, 'lemak': 4.8},
-        'Sayur Bayam': {'kalori': 23, 'protein': 2.9, 'karbohidrat': 3.6, 'lemak': 0.4},
-        'Apel': {'kalori': 52, 'protein': 0.3, 'karbohidrat': 14, 'lemak': 0.2},
-        'Pisang': {'kalori': 89, 'protein': 1.1, 'karbohidrat': 23, 'lemak': 0.3},
-        'Ikan Salmon': {'kalori': 208, 'protein': 22, 'karbohidrat': 0, 'lemak': 13},
-        'Kentang': {'kalori': 77, 'protein': 2, 'karbohidrat': 17, 'lemak': 0.1}
-    }
-        
-    return chat_data, df_symptom, food_data
+        return fetch_food_matches(query.strip().lower())
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        st.error(f"Gagal mencari makanan: {str(e)}")
+        return []
+
+def load_reference(path, key):
+    try:
+        return fetch_reference(path)[key]
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        st.error(f"Gagal memuat data dari server HealthierBot: {str(e)}")
+        return None
 
 def save_chat_history():
     """Menyimpan history chat ke file"""
@@ -132,102 +155,18 @@ def load_chat_history():
         st.error(f"Gagal memuat history chat: {str(e)}")
         return []
 
-# Function untuk memberikan saran diet
-def get_diet_recommendation(berat_badan, tinggi_badan, usia, jenis_kelamin, aktivitas, tujuan):
-    # Menghitung BMI
-    tinggi_m = tinggi_badan / 100
-    bmi = berat_badan / (tinggi_m * tinggi_m)
-    
-    # Menghitung BMR (Basal Metabolic Rate) dengan rumus Harris-Benedict
-    if jenis_kelamin == "Pria":
-        bmr = 88.362 + (13.397 * berat_badan) + (4.799 * tinggi_badan) - (5.677 * usia)
-    else:
-        bmr = 447.593 + (9.247 * berat_badan) + (3.098 * tinggi_badan) - (4.330 * usia)
-    
-    # Faktor aktivitas
-    aktivitas_faktor = {
-        "Sangat Jarang": 1.2,
-        "Ringan": 1.375,
-        "Sedang": 1.55,
-        "Aktif": 1.725,
-        "Sangat Aktif": 1.9
-    }
-    
-    # Total kebutuhan kalori
-    total_kalori = bmr * aktivitas_faktor[aktivitas]
-    
-    # Menyesuaikan dengan tujuan
-    if tujuan == "Menurunkan Berat Badan":
-        total_kalori *= 0.8  # Defisit 20%
-    elif tujuan == "Menambah Berat Badan":
-        total_kalori *= 1.2  # Surplus 20%
-    
-    # Membuat rekomendasi berdasarkan BMI
-    if bmi < 18.5:
-        status = "Berat badan kurang"
-        saran = "Fokus pada makanan bergizi tinggi dan protein untuk membangun massa otot."
-    elif bmi < 25:
-        status = "Berat badan normal"
-        saran = "Pertahankan pola makan seimbang dengan variasi makanan yang beragam."
-    elif bmi < 30:
-        status = "Berat badan berlebih"
-        saran = "Kurangi asupan kalori dan tingkatkan aktivitas fisik."
-    else:
-        status = "Obesitas"
-        saran = "Konsultasikan dengan dokter atau ahli gizi untuk program penurunan berat badan yang aman."
-    
-    return {
-        'bmi': round(bmi, 2),
-        'status': status,
-        'kalori_harian': round(total_kalori),
-        'saran': saran
-    }
-
-# Function untuk mendiagnosis gejala sederhana
-def diagnose_symptoms(selected_symptoms):
-    common_conditions = {
-        'Demam': ['demam', 'menggigil', 'sakit kepala', 'lemas'],
-        'Flu': ['demam', 'hidung tersumbat', 'bersin', 'batuk', 'sakit tenggorokan'],
-        'Migrain': ['sakit kepala berdenyut', 'mual', 'sensitif cahaya', 'sensitif suara'],
-        'Maag': ['nyeri perut', 'mual', 'kembung', 'tidak nafsu makan'],
-        'Alergi': ['bersin', 'gatal', 'ruam kulit', 'mata berair']
-    }
-    
-    possible_conditions = []
-    for condition, symptoms in common_conditions.items():
-        matching_symptoms = len(set(selected_symptoms) & set(symptoms))
-        if matching_symptoms >= 2:  # Jika minimal 2 gejala cocok
-            possible_conditions.append(condition)
-    
-    return possible_conditions
-
-# Function to get response based on medical dataset
-def get_response_from_dataset(prompt, chat_data):
-    prompt = prompt.lower()
-    best_response = "Maaf, saya tidak memiliki informasi tentang hal tersebut. Silakan konsultasikan dengan dokter."
-    
-    # Check for disease information
-    for item in chat_data:
-        if "prompt" in item and "response" in item:
-            if prompt in item["prompt"].lower() or item["prompt"].lower() in prompt:
-                return item["response"]
-            
-            # Check for keywords
-            keywords = ["apa", "bagaimana", "mengobati", "gejala", "penyakit", "sakit"]
-            for keyword in keywords:
-                if keyword in prompt and keyword in item["prompt"].lower():
-                    return item["response"]
-    
-    return best_response
-
 # Initialize chat history in session state if it doesn't exist
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
     # Load chat history at startup
     st.session_state.chat_history = load_chat_history()
 
-# Load all datasets
-chat_data, df_symptom, food_data = load_datasets()
+if 'history_window' not in st.session_state:
+    st.session_state.history_window = HISTORY_PAGE_SIZE
+if 'rerun_times' not in st.session_state:
+    st.session_state.rerun_times = deque(maxlen=50)
+if 'triage' not in st.session_state:
+    st.session_state.triage = None
 
 # UI Streamlit
 st.title("🤖 HealthierBot")
@@ -238,6 +177,7 @@ with st.sidebar:
     st.image("https://img.icons8.com/color/96/000000/healthcare-and-medical.png", width=80)
     st.markdown("### Menu Utama")
     menu = st.selectbox("Pilih Fitur", ["ChatBot Kesehatan", "Saran Diet", "Kalkulator Kalori", "Diagnosis Sederhana"])
+    rerun_time_slot = st.empty()
 
 # ChatBot Kesehatan
 if menu == "ChatBot Kesehatan":
@@ -251,6 +191,8 @@ if menu == "ChatBot Kesehatan":
         with col1:
             if st.button("Hapus History", use_container_width=True):
                 st.session_state.chat_history = []
+                st.session_state.history_window = HISTORY_PAGE_SIZE
+                st.session_state.pop("session_id", None)
                 save_chat_history()
                 st.success("History chat berhasil dihapus!")
         
@@ -274,10 +216,15 @@ if menu == "ChatBot Kesehatan":
             st.caption("Jika tidak diisi, bot akan menggunakan dataset lokal")
             use_openai = st.checkbox("Gunakan OpenAI API", value=False)
     
-    # Display chat history if enabled
+    # Display chat history if enabled, one window of HISTORY_PAGE_SIZE messages at a time
     if show_history and len(st.session_state.chat_history) > 0:
         st.subheader("History Chat")
-        for message in st.session_state.chat_history:
+        history = st.session_state.chat_history
+        hidden = len(history) - st.session_state.history_window
+        if hidden > 0:
+            if st.button(f"Muat {min(hidden, HISTORY_PAGE_SIZE)} pesan sebelumnya ({hidden} tersembunyi)"):
+                st.session_state.history_window += HISTORY_PAGE_SIZE
+        for message in history[-st.session_state.history_window:]:
             with st.chat_message(message["role"]):
                 st.write(message["content"])
     
@@ -289,48 +236,30 @@ if menu == "ChatBot Kesehatan":
         with st.chat_message("user"):
             st.write(user_input)
         
+        # The backend keeps recent turns per session, so only the session ID is sent
+        payload = {"input": user_input, "session_id": st.session_state.get("session_id")}
+        if use_openai and api_key:
+            payload.update(use_openai=True, openai_api_key=api_key)
+        
         # Add user message to chat history
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         save_chat_history()
         
-        # Get response
+        # Get response from the backend
         with st.chat_message("assistant"):
             with st.spinner("Berpikir..."):
-                if use_openai and api_key:
-                    try:
-                        from openai import OpenAI
-                        client = OpenAI(api_key=api_key)
-                        
-                        messages = [
-                            {"role": "system", "content": "Kamu adalah HealthierBot, asisten kesehatan yang membantu memberikan informasi medis. Kamu memberikan informasi yang akurat dan mudah dipahami. Kamu BUKAN dokter dan selalu menyarankan pengguna untuk berkonsultasi dengan profesional medis untuk diagnosis dan pengobatan."}
-                        ]
-                        
-                        # Add chat history
-                        for message in st.session_state.chat_history[:-1]:
-                            messages.append({"role": message["role"], "content": message["content"]})
-                        
-                        # Add current prompt
-                        messages.append({"role": "user", "content": user_input})
-                        
-                        response = client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=messages,
-                            max_tokens=500,
-                            temperature=0.7
-                        )
-                        
-                        ai_response = response.choices[0].message.content
-                    except Exception as e:
-                        ai_response = f"Tidak dapat menggunakan OpenAI API: {str(e)}\n\n"
-                        ai_response += get_response_from_dataset(user_input, chat_data)
-                else:
-                    ai_response = get_response_from_dataset(user_input, chat_data)
-                
-                st.write(ai_response)
+                result = call_api("POST", "/api/chat", json=payload)
+                ai_response = result["answer"] if result else None
+                if result:
+                    st.session_state.session_id = result["session_id"]
+                if ai_response:
+                    st.write(ai_response)
+                    st.caption(f"Sumber jawaban: {result['tier']}")
         
         # Add AI response to chat history
-        st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
-        save_chat_history()
+        if ai_response:
+            st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
+            save_chat_history()
 
 elif menu == "Saran Diet":
     st.header("🥗 Saran Diet dan Makanan Seimbang")
@@ -355,40 +284,45 @@ elif menu == "Saran Diet":
         tujuan = st.selectbox("Tujuan Diet", ["Menurunkan Berat Badan", "Mempertahankan Berat Badan", "Menambah Berat Badan"])
 
     if st.button("Dapatkan Saran Diet", use_container_width=True):
-        hasil = get_diet_recommendation(berat_badan, tinggi_badan, usia, jenis_kelamin, aktivitas, tujuan)
-        
-        st.subheader("Hasil Analisis")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("BMI", f"{hasil['bmi']}")
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col2:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Status", hasil['status'])
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col3:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Kebutuhan Kalori Harian", f"{hasil['kalori_harian']} kkal")
-            st.markdown('</div>', unsafe_allow_html=True)
+        hasil = call_api("POST", "/api/diet", json={
+            "berat_badan": berat_badan, "tinggi_badan": tinggi_badan, "usia": usia,
+            "jenis_kelamin": jenis_kelamin, "aktivitas": aktivitas, "tujuan": tujuan
+        })
         
-        st.markdown(f'<div>{hasil["saran"]}</div>', unsafe_allow_html=True)
-        
-        st.subheader("Rekomendasi Makanan")
-        st.write("Berikut adalah contoh makanan sehat yang bisa Anda konsumsi:")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("##### Sarapan:")
-            st.markdown("- Oatmeal dengan buah")
-            st.markdown("- Telur + roti gandum")
-            st.markdown("- Yogurt dengan granola")
-        
-        with col2:
-            st.markdown("##### Makan Siang/Malam:")
-            st.markdown("- Nasi + ayam dada + sayuran")
-            st.markdown("- Ikan + kentang + sayuran")
-            st.markdown("- Tempe/tahu + sayuran")
+        if hasil:
+            st.subheader("Hasil Analisis")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("BMI", f"{hasil['bmi']}")
+                st.markdown('</div>', unsafe_allow_html=True)
+            with col2:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Status", hasil['status'])
+                st.markdown('</div>', unsafe_allow_html=True)
+            with col3:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Kebutuhan Kalori Harian", f"{hasil['kalori_harian']} kkal")
+                st.markdown('</div>', unsafe_allow_html=True)
+
+            st.markdown(f'<div>{hasil["saran"]}</div>', unsafe_allow_html=True)
+
+            st.subheader("Rekomendasi Makanan")
+            meal_plan = hasil.get("meal_plan")
+            if meal_plan:
+                st.write("Contoh menu harian yang disusun sesuai kebutuhan kalori Anda:")
+                meal_titles = {"sarapan": "Sarapan", "makan_siang": "Makan Siang", "makan_malam": "Makan Malam"}
+                for col, (meal, title) in zip(st.columns(len(meal_titles)), meal_titles.items()):
+                    with col:
+                        menu_makan = meal_plan[meal]
+                        st.markdown(f"##### {title}:")
+                        for item in menu_makan["items"]:
+                            st.markdown(f"- {item['nama']} {item['porsi']:g} g ({item['kalori']} kkal)")
+                        st.caption(f"Total {menu_makan['total']['kalori']} kkal dari target {menu_makan['target_kalori']} kkal")
+                        if not menu_makan["dalam_target"]:
+                            st.warning("Menu ini belum mencapai target kalori; tambahkan porsi atau camilan.")
+            else:
+                st.write("Data makanan belum cukup untuk menyusun menu harian.")
 
 elif menu == "Kalkulator Kalori":
     st.header("🍽️ Kalkulator Kalori Makanan")
@@ -398,90 +332,130 @@ elif menu == "Kalkulator Kalori":
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        selected_food = st.selectbox("Pilih Jenis Makanan", list(food_data.keys()))
+        query = st.text_input("Cari Makanan", placeholder="contoh: ayam, nasi, tempe")
+        matches = search_foods(query) if query.strip() else []
+        selected_food = st.selectbox("Pilih Jenis Makanan", matches)
     
     with col2:
         portion = st.number_input("Porsi (gram)", min_value=1, value=100, step=10)
     
-    if st.button("Hitung Kalori", use_container_width=True):
-        food_info = food_data[selected_food]
-        kalori = (food_info['kalori'] * portion) / 100
-        protein = (food_info['protein'] * portion) / 100
-        karbohidrat = (food_info['karbohidrat'] * portion) / 100
-        lemak = (food_info['lemak'] * portion) / 100
-        
-        st.subheader(f"Informasi Nutrisi untuk {selected_food} ({portion}g)")
+    if st.button("Hitung Kalori", use_container_width=True, disabled=not selected_food):
+        hasil = call_api("POST", "/api/calories", json={"food_items": [{"name": selected_food, "portion": portion}]})
         
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Kalori", f"{round(kalori, 1)} kkal")
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col2:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Protein", f"{round(protein, 1)}g")
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col3:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Karbohidrat", f"{round(karbohidrat, 1)}g")
-            st.markdown('</div>', unsafe_allow_html=True)
-        with col4:
-            st.markdown('<div>', unsafe_allow_html=True)
-            st.metric("Lemak", f"{round(lemak, 1)}g")
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-        st.markdown('<div>Catatan: Nilai gizi di atas adalah perkiraan dan dapat bervariasi tergantung pada cara pengolahan dan kualitas bahan makanan.</div>', unsafe_allow_html=True)
+        if hasil:
+            nutrisi = hasil["total"]
+            st.subheader(f"Informasi Nutrisi untuk {selected_food} ({portion}g)")
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Kalori", f"{nutrisi['kalori']} kkal")
+                st.markdown('</div>', unsafe_allow_html=True)
+            with col2:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Protein", f"{nutrisi['protein']}g")
+                st.markdown('</div>', unsafe_allow_html=True)
+            with col3:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Karbohidrat", f"{nutrisi['karbohidrat']}g")
+                st.markdown('</div>', unsafe_allow_html=True)
+            with col4:
+                st.markdown('<div>', unsafe_allow_html=True)
+                st.metric("Lemak", f"{nutrisi['lemak']}g")
+                st.markdown('</div>', unsafe_allow_html=True)
+
+            st.markdown('<div>Catatan: Nilai gizi di atas adalah perkiraan dan dapat bervariasi tergantung pada cara pengolahan dan kualitas bahan makanan.</div>', unsafe_allow_html=True)
 
 elif menu == "Diagnosis Sederhana":
     st.header("🏥 Diagnosis Sederhana")
     st.markdown('<div>Perhatian: Fitur ini hanya memberikan informasi awal dan BUKAN pengganti konsultasi dengan dokter!</div>', unsafe_allow_html=True)
     
-    symptoms = [
-        'demam', 'menggigil', 'sakit kepala', 'lemas',
-        'hidung tersumbat', 'bersin', 'batuk', 'sakit tenggorokan',
-        'sakit kepala berdenyut', 'mual', 'sensitif cahaya', 'sensitif suara',
-        'nyeri perut', 'kembung', 'tidak nafsu makan',
-        'gatal', 'ruam kulit', 'mata berair'
-    ]
+    mode = st.radio("Metode", ["Tanya jawab gejala", "Pilih gejala sendiri"], horizontal=True)
+
+    if mode == "Tanya jawab gejala":
+        # Satu pertanyaan per langkah; server memilih gejala yang paling mempersempit kemungkinan
+        if st.session_state.triage is None:
+            if st.button("Mulai Tanya Jawab", use_container_width=True):
+                result = call_api("POST", "/api/triage/start")
+                if result:  # Jika gagal, error dari call_api tetap tampil (tanpa rerun)
+                    st.session_state.triage = result
+                    st.rerun()
+        else:
+            triage = st.session_state.triage
+            if not triage["done"]:
+                st.markdown(f"#### Apakah Anda mengalami **{triage['question_label']}**?")
+                st.caption(f"Kemungkinan kondisi tersisa: {triage['remaining']}")
+                answer = None
+                col1, col2, col3 = st.columns(3)
+                if col1.button("Ya", use_container_width=True):
+                    answer = "yes"
+                if col2.button("Tidak", use_container_width=True):
+                    answer = "no"
+                if col3.button("Tidak tahu", use_container_width=True):
+                    answer = "unknown"
+                if answer:
+                    result = call_api("POST", "/api/triage/answer", json={"session_id": triage["session_id"], "answer": answer})
+                    if result:
+                        st.session_state.triage = result
+                        st.rerun()
+                    # Gagal (misal sesi kedaluwarsa): error tetap tampil, pengguna dapat menekan "Ulangi"
+
+            if triage["conditions"]:
+                st.subheader("Kemungkinan Kondisi:" if triage["done"] else "Kandidat Sementara:")
+                for condition in triage["conditions"]:
+                    st.markdown(f"- **{condition['disease']}** ({condition['probability']:.0%}): {condition['description']}")
+
+            if st.button("Ulangi", use_container_width=True):
+                st.session_state.triage = None
+                st.rerun()
+
+    else:
+        symptoms = load_reference("/api/symptoms", "symptoms") or []
     
-    st.markdown("#### Pilih gejala yang Anda alami:")
+        st.markdown("#### Pilih gejala yang Anda alami:")
     
-    # Create a more organized layout for symptoms selection
-    col1, col2 = st.columns(2)
+        # Create a more organized layout for symptoms selection
+        col1, col2 = st.columns(2)
     
-    with col1:
-        selected_symptoms_1 = st.multiselect(
-            "Gejala umum:",
-            options=sorted(symptoms[:9]),
-            help="Pilih satu atau lebih gejala yang Anda rasakan"
-        )
+        with col1:
+            selected_symptoms_1 = st.multiselect(
+                "Gejala umum:",
+                options=sorted(symptoms[:9]),
+                help="Pilih satu atau lebih gejala yang Anda rasakan"
+            )
     
-    with col2:
-        selected_symptoms_2 = st.multiselect(
-            "Gejala spesifik:",
-            options=sorted(symptoms[9:]),
-            help="Pilih satu atau lebih gejala yang Anda rasakan"
-        )
+        with col2:
+            selected_symptoms_2 = st.multiselect(
+                "Gejala spesifik:",
+                options=sorted(symptoms[9:]),
+                help="Pilih satu atau lebih gejala yang Anda rasakan"
+            )
     
-    # Combine selected symptoms
-    selected_symptoms = selected_symptoms_1 + selected_symptoms_2
+        # Combine selected symptoms
+        selected_symptoms = selected_symptoms_1 + selected_symptoms_2
     
-    if selected_symptoms:
-        if st.button("Analisis Gejala", use_container_width=True):
-            possible_conditions = diagnose_symptoms(selected_symptoms)
+        if selected_symptoms:
+            if st.button("Analisis Gejala", use_container_width=True):
+                result = call_api("POST", "/api/diagnosis", json={"symptoms": selected_symptoms})
+                possible_conditions = result["conditions"] if result else []
             
-            if possible_conditions:
-                st.subheader("Kemungkinan Kondisi:")
-                for condition in possible_conditions:
-                    st.markdown(f"- **{condition}**")
-                
-                st.markdown("""
-                <div>
-                <strong>Catatan penting:</strong><br>
-                1. Diagnosis ini hanya berdasarkan gejala umum dan BUKAN diagnosis medis resmi<br>
-                2. Jika gejala berlanjut atau memburuk, segera konsultasikan dengan dokter<br>
-                3. Diagnosis ini tidak menggantikan pemeriksaan medis profesional
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.warning("Tidak dapat menentukan diagnosis berdasarkan gejala yang dipilih. Silakan konsultasikan dengan dokter untuk pemeriksaan lebih lanjut.")
+                if possible_conditions:
+                    st.subheader("Kemungkinan Kondisi:")
+                    for condition in possible_conditions:
+                        st.markdown(f"- **{condition}**")
+
+                    st.markdown("""
+                    <div>
+                    <strong>Catatan penting:</strong><br>
+                    1. Diagnosis ini hanya berdasarkan gejala umum dan BUKAN diagnosis medis resmi<br>
+                    2. Jika gejala berlanjut atau memburuk, segera konsultasikan dengan dokter<br>
+                    3. Diagnosis ini tidak menggantikan pemeriksaan medis profesional
+                    </div>
+                    """, unsafe_allow_html=True)
+                elif result:
+                    st.warning("Tidak dapat menentukan diagnosis berdasarkan gejala yang dipilih. Silakan konsultasikan dengan dokter untuk pemeriksaan lebih lanjut.")
+
+# Catat waktu eksekusi skrip untuk rerun ini
+st.session_state.rerun_times.append((time.perf_counter() - rerun_start) * 1000)
+rerun_times = st.session_state.rerun_times
+rerun_time_slot.caption(f"Waktu render: {rerun_times[-1]:.1f} ms (rata-rata {sum(rerun_times) / len(rerun_times):.1f} ms dari {len(rerun_times)} rerun)")